@@ -0,0 +1,374 @@
+# Latency benchmarks for the Hugging Face request path
+# Run with: python benchmark.py
+# Everything runs against a local mock inference server, no token needed.
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+import hf_client
+from progress_store import ProgressStore
+
+MISSION = "Master the art of public speaking"
+MISSION_PROMPTS = {
+    "refined_mission": f"Refine this cosmic growth mission: {MISSION}",
+    "strategy": f"Create a 30-day interstellar strategy for: {MISSION}",
+    "cosmic_wisdom": "Share profound cosmic wisdom about growth and space exploration",
+}
+
+
+class MockInferenceHandler(BaseHTTPRequestHandler):
+    # Stand-in for the inference API; latency depends on the prompt so the
+    # three mission calls take visibly different times
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    latencies = {"Refine": 0.6, "Create": 0.9, "Share": 0.4}
+    requests_served = 0
+
+    def do_POST(self):
+        MockInferenceHandler.requests_served += 1
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = payload["inputs"]
+        time.sleep(self.latencies.get(prompt.split()[0], 0.5))
+        self._send_json(200, [{"generated_text": f"{prompt} ... generated"}])
+
+    def _send_json(self, status, body, extra_headers=None):
+        data = json.dumps(body).encode()
+        try:
+            self.send_response(status)
+            for name, value in (extra_headers or {}).items():
+                self.send_header(name, value)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the client gave up (deadline or timeout)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ScriptedInferenceHandler(MockInferenceHandler):
+    # Plays back `script` (a list of (status, body, headers)) one response per
+    # request, then answers 200 immediately; `down` makes every request a 500
+    script = []
+    down = False
+
+    def do_POST(self):
+        ScriptedInferenceHandler.requests_served += 1
+        self.rfile.read(int(self.headers["Content-Length"]))
+        if self.down:
+            self._send_json(500, {"error": "internal error"})
+        elif self.script:
+            self._send_json(*self.script.pop(0))
+        else:
+            self._send_json(200, [{"generated_text": "ok"}])
+
+
+class StreamingInferenceHandler(MockInferenceHandler):
+    # Text-generation style endpoint: `prefill` seconds before the first token,
+    # then one token every `token_interval`. With "stream": true the tokens go
+    # out as server-sent events over a chunked response; without it the client
+    # gets the whole text once the last token is done. `reject_stream` answers
+    # streaming requests with a 400, like an endpoint without streaming support.
+    prefill = 0.15
+    token_interval = 0.03
+    tokens = 30
+    reject_stream = False
+
+    def do_POST(self):
+        StreamingInferenceHandler.requests_served += 1
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        words = [f"word{i} " for i in range(self.tokens)]
+        if not payload.get("stream"):
+            time.sleep(self.prefill + self.token_interval * self.tokens)
+            self._send_json(200, [{"generated_text": "".join(words)}])
+            return
+        if self.reject_stream:
+            self._send_json(400, {"error": "streaming is not supported"})
+            return
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(self.prefill)
+            for i, word in enumerate(words):
+                last = i == len(words) - 1
+                event = {"token": {"id": i, "text": word, "special": False},
+                         "generated_text": "".join(words) if last else None}
+                self._send_chunk(f"data: {json.dumps(event)}\n\n".encode())
+                if not last:
+                    time.sleep(self.token_interval)
+            self._send_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_mock_server(handler=MockInferenceHandler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    hf_client.API_URL = f"http://127.0.0.1:{server.server_port}/models/mock"
+    return server
+
+
+def bench_mission_plan(rounds=3):
+    server = start_mock_server()
+    sequential = concurrent = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for text in MISSION_PROMPTS.values():
+            hf_client.generate(text)
+        sequential += time.perf_counter() - start
+
+        hf_client.cache.clear()  # measure the upstream calls, not the cache
+        start = time.perf_counter()
+        arrivals = []
+        for name, result, error in hf_client.generate_many(MISSION_PROMPTS, deadline=5):
+            assert error is None and result
+            arrivals.append(f"{name} {time.perf_counter() - start:.2f}s")
+        concurrent += time.perf_counter() - start
+    print(f"Mission plan: sequential {sequential / rounds:.2f}s, concurrent {concurrent / rounds:.2f}s "
+          f"(slowest single call {max(MockInferenceHandler.latencies.values()):.2f}s)")
+    print("  cards rendered at: " + ", ".join(arrivals))
+
+    # A deadline shorter than the slowest call still returns the fast cards on time
+    hf_client.cache.clear()
+    start = time.perf_counter()
+    results = list(hf_client.generate_many(MISSION_PROMPTS, deadline=0.7))
+    late = [name for name, _, error in results if isinstance(error, hf_client.DeadlineExceeded)]
+    print(f"  0.7s deadline: returned after {time.perf_counter() - start:.2f}s, timed out: {late}")
+    server.shutdown()
+
+
+def bench_response_cache(sessions=20):
+    # `sessions` users launch the same mission at the same moment, then again one by one
+    server = start_mock_server()
+    hf_client.cache = hf_client.ResponseCache()
+    MockInferenceHandler.requests_served = 0
+
+    def launch():
+        for _, result, error in hf_client.generate_many(MISSION_PROMPTS, deadline=5):
+            assert error is None and result
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=launch) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    burst = time.perf_counter() - start
+    burst_upstream = MockInferenceHandler.requests_served
+
+    start = time.perf_counter()
+    for _ in range(sessions):
+        launch()
+    repeat_ms = (time.perf_counter() - start) / sessions * 1000
+    stats = hf_client.cache.stats()
+    print(f"Response cache, {sessions} sessions x {len(MISSION_PROMPTS)} prompts: simultaneous burst took "
+          f"{burst:.2f}s with {burst_upstream} upstream calls (uncached: {sessions * len(MISSION_PROMPTS)}); "
+          f"repeat launches {repeat_ms:.2f} ms each")
+    print(f"  hit rate {stats['hit_rate']:.0%}, {stats['saved_calls']} calls saved "
+          f"({stats['coalesced']} coalesced, {stats['hits']} hits), {MockInferenceHandler.requests_served} upstream in total")
+
+    # Expired entries go back upstream; the LRU bound caps memory
+    hf_client.cache = hf_client.ResponseCache(max_entries=2, ttl=0.2)
+    launch()
+    time.sleep(0.3)
+    launch()
+    stats = hf_client.cache.stats()
+    print(f"  ttl 0.2s / 2 entries: {stats['upstream_calls']} upstream calls for 2 launches, "
+          f"{stats['entries']} cached, {stats['evictions']} evicted")
+    hf_client.cache = hf_client.ResponseCache()
+    server.shutdown()
+
+
+def _first_token(chunks):
+    # (seconds to the first chunk, seconds to the last, full text)
+    start = time.perf_counter()
+    first, text = None, ""
+    for piece in chunks:
+        if first is None:
+            first = time.perf_counter() - start
+        text += piece
+    return first, time.perf_counter() - start, text
+
+
+def _whole_answer(text):
+    yield hf_client.generate(text)
+
+
+def bench_time_to_first_token(rounds=3):
+    server = start_mock_server(StreamingInferenceHandler)
+    handler = StreamingInferenceHandler
+    whole = streamed = (0.0, 0.0)
+    for i in range(rounds):
+        # A fresh prompt each round so the response cache stays out of the way
+        elapsed = _first_token(_whole_answer(f"Refine mission {i}"))
+        whole = (whole[0] + elapsed[0], whole[1] + elapsed[1])
+        first, total, text = _first_token(hf_client.generate_stream(f"Refine mission {i}"))
+        assert text == "".join(f"word{j} " for j in range(handler.tokens))
+        streamed = (streamed[0] + first, streamed[1] + total)
+    print(f"Time to first token ({handler.tokens} tokens, {handler.prefill:.2f}s prefill + "
+          f"{handler.token_interval * 1000:.0f} ms/token): whole answer {whole[0] / rounds:.2f}s, "
+          f"streamed {streamed[0] / rounds:.2f}s (last token at {streamed[1] / rounds:.2f}s)")
+
+    # Three cards at once: when does each card first show text?
+    hf_client.cache.clear()
+    start = time.perf_counter()
+    first_seen, updates = {}, 0
+    for name, text, finished, error in hf_client.stream_many(MISSION_PROMPTS, deadline=5):
+        assert error is None
+        updates += 1
+        first_seen.setdefault(name, time.perf_counter() - start)
+    print("  mission plan streamed: cards first show text at "
+          + ", ".join(f"{name} {t:.2f}s" for name, t in first_seen.items())
+          + f", done at {time.perf_counter() - start:.2f}s after {updates} card updates")
+
+    first, total, _ = _first_token(hf_client.generate_stream(MISSION_PROMPTS["strategy"]))
+    print(f"  repeated prompt from the cache: first token at {first * 1000:.2f} ms")
+    served = handler.requests_served
+    hf_client.cached_generate(MISSION_PROMPTS["refined_mission"])
+    assert handler.requests_served == served  # streamed answers are cached for cached_generate too
+
+    # Sessions launching the same prompt at once share one upstream stream
+    hf_client.cache.clear()
+    served = handler.requests_served
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        texts = list(pool.map(lambda _: "".join(hf_client.generate_stream("Refine a shared mission")), range(10)))
+    assert len(set(texts)) == 1
+    print(f"  10 concurrent identical streams: {handler.requests_served - served} upstream call(s)")
+
+    handler.reject_stream = True
+    first, total, text = _first_token(hf_client.generate_stream("Refine a new mission"))
+    handler.reject_stream = False
+    print(f"  endpoint without streaming: fell back to the whole answer at {first:.2f}s ({len(text.split())} words)")
+    server.shutdown()
+
+
+def bench_keep_alive(calls=300):
+    server = start_mock_server(ScriptedInferenceHandler)
+    start = time.perf_counter()
+    for _ in range(calls):
+        requests.post(hf_client.API_URL, json=hf_client.build_payload("hi"))
+    fresh = (time.perf_counter() - start) / calls * 1000
+    start = time.perf_counter()
+    for _ in range(calls):
+        hf_client.generate("hi")
+    pooled = (time.perf_counter() - start) / calls * 1000
+    print(f"Per call overhead: new connection each time {fresh:.2f} ms, pooled session {pooled:.2f} ms "
+          f"(plain HTTP on localhost; real TLS handshakes cost far more)")
+    server.shutdown()
+
+
+def bench_retries():
+    server = start_mock_server(ScriptedInferenceHandler)
+    hf_client.breaker = hf_client.CircuitBreaker()
+    ScriptedInferenceHandler.script = [
+        (503, {"error": "Model is currently loading", "estimated_time": 0.3}, None),
+        (429, {"error": "Rate limited"}, {"Retry-After": "0.2"}),
+    ]
+    ScriptedInferenceHandler.requests_served = 0
+    start = time.perf_counter()
+    text = hf_client.generate("hi", deadline=5)
+    print(f"503 (estimated_time 0.3s) then 429 (Retry-After 0.2s): got {text!r} after "
+          f"{time.perf_counter() - start:.2f}s and {ScriptedInferenceHandler.requests_served} requests")
+
+    # With a hint longer than the remaining deadline we give up at once instead of sleeping
+    ScriptedInferenceHandler.script = [(503, {"error": "loading", "estimated_time": 60}, None)]
+    start = time.perf_counter()
+    try:
+        hf_client.generate("hi", deadline=5)
+    except hf_client.ModelLoading:
+        print(f"503 with estimated_time 60s and a 5s deadline: fell back after {time.perf_counter() - start:.3f}s")
+    server.shutdown()
+
+
+def bench_circuit_breaker(calls=20):
+    server = start_mock_server(ScriptedInferenceHandler)
+    hf_client.breaker = hf_client.CircuitBreaker(failure_threshold=5, reset_timeout=0.5)
+    ScriptedInferenceHandler.down = True
+    ScriptedInferenceHandler.requests_served = 0
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        try:
+            hf_client.generate("hi", deadline=5)
+        except hf_client.HFError:
+            pass
+        timings.append(time.perf_counter() - start)
+    print(f"Endpoint down: first call {timings[0]:.2f}s (retries), later calls "
+          f"{sum(timings[2:]) / len(timings[2:]) * 1e6:.0f} µs; {ScriptedInferenceHandler.requests_served} "
+          f"upstream requests for {calls} calls, breaker {hf_client.breaker.state}")
+
+    ScriptedInferenceHandler.down = False
+    time.sleep(0.5)
+    text = hf_client.generate("hi")
+    print(f"After recovery: half-open trial returned {text!r}, breaker {hf_client.breaker.state}")
+    server.shutdown()
+
+
+def bench_progress_store(explorers=5_000, missions=3, clicks=2_000):
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ProgressStore(os.path.join(tmp, "progress.db"))
+        start = time.perf_counter()
+        for e in range(explorers):
+            for m in range(missions):
+                store.set_progress(f"explorer{e}", f"mission{m}", rng.getrandbits(30))
+        seed_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(clicks):
+            store.set_day(f"explorer{rng.randrange(explorers)}", f"mission{rng.randrange(missions)}",
+                          rng.randrange(30), rng.random() < 0.5)
+        click_us = (time.perf_counter() - start) / clicks * 1e6
+
+        start = time.perf_counter()
+        for _ in range(100):
+            top = store.leaderboard(limit=10, by="streak")
+        board_us = (time.perf_counter() - start) / 100 * 1e6
+        start = time.perf_counter()
+        for _ in range(100):
+            store.rank(f"explorer{rng.randrange(explorers)}")
+        rank_us = (time.perf_counter() - start) / 100 * 1e6
+
+        # What the summary table saves: aggregating every mission per query
+        start = time.perf_counter()
+        for _ in range(10):
+            scan = store.conn.execute(
+                "SELECT explorer, max(streak) AS best FROM missions GROUP BY explorer ORDER BY best DESC LIMIT 10"
+            ).fetchall()
+        scan_us = (time.perf_counter() - start) / 10 * 1e6
+        assert [row["streak"] for row in top] == [row[1] for row in scan]
+
+        rows = explorers * missions
+        store.conn.execute("VACUUM")
+        size = os.path.getsize(os.path.join(tmp, "progress.db"))
+        store.close()
+    print(f"Progress store, {explorers:,} explorers x {missions} missions: seeded in {seed_s:.1f}s, "
+          f"{size / rows:.0f} bytes per mission on disk (a JSON list of 30 bools is "
+          f"{len(json.dumps([False] * 30))} bytes before any key)")
+    print(f"  tick one day {click_us:.0f} µs (committed), top 10 by streak {board_us:.0f} µs, "
+          f"rank of one explorer {rank_us:.0f} µs, top 10 by GROUP BY {scan_us:.0f} µs")
+
+
+if __name__ == "__main__":
+    bench_mission_plan()
+    bench_response_cache()
+    bench_time_to_first_token()
+    bench_keep_alive()
+    bench_retries()
+    bench_circuit_breaker()
+    bench_progress_store()
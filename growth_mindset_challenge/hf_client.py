@@ -0,0 +1,422 @@
+# Hugging Face inference client for the Growth Mindset app
+#
+# Kept free of Streamlit calls so requests can run on worker threads; main.py
+# decides how to show errors and when to fall back to canned responses.
+# generate_many issues several prompts at once on a shared thread pool and
+# yields each result as soon as it arrives, within one overall deadline.
+#
+# All calls share one keep-alive requests.Session. Overload and "model loading"
+# answers (429/5xx) and request errors (connection, timeout, torn body) are
+# retried with jittered exponential backoff, waiting at least as long as the
+# API's estimated_time / Retry-After hint, but never past the caller's
+# deadline. A circuit breaker counts failed attempts; once open, calls fail
+# immediately with CircuitOpen so the app can show its fallback responses
+# instead of waiting on a dead endpoint.
+#
+# cached_generate puts a shared ResponseCache in front of generate: repeated
+# prompts (the cosmic wisdom one is the same for everybody) are answered from
+# memory, and identical prompts already in flight share one upstream call.
+#
+# generate_stream asks for a server-sent-event token stream ("stream": true)
+# and yields text as it arrives, so the first words show up long before the
+# whole answer is done. An endpoint that ignores the flag and answers with plain
+# JSON is handled as a single chunk, and one that rejects it (4xx) falls back
+# to the non-streaming call. Streamed answers go through the same cache and
+# single-flight as cached_generate.
+
+import json
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from response_cache import ResponseCache, cache_key
+
+load_dotenv()
+
+API_URL = os.getenv("HUGGINGFACE_API_URL", "https://api-inference.huggingface.co/models/facebook/opt-350m")
+MAX_WORKERS = int(os.getenv("HUGGINGFACE_MAX_WORKERS", "8"))
+MAX_RETRIES = int(os.getenv("HUGGINGFACE_MAX_RETRIES", "3"))
+STREAM = os.getenv("HUGGINGFACE_STREAM", "1") == "1"  # on by default; HUGGINGFACE_STREAM=0 waits for whole answers
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+CACHE_SIZE = int(os.getenv("HUGGINGFACE_CACHE_SIZE", "256"))
+CACHE_TTL = float(os.getenv("HUGGINGFACE_CACHE_TTL", "3600"))
+
+# Access the token
+token = os.getenv("HUGGINGFACE_TOKEN")
+headers = {"Authorization": f"Bearer {token}"}
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="hf")
+
+
+class HFError(Exception):
+    pass
+
+
+class ModelLoading(HFError):
+    pass
+
+
+class DeadlineExceeded(HFError):
+    pass
+
+
+class CircuitOpen(HFError):
+    pass
+
+
+class BadRequest(HFError):
+    pass
+
+
+class CircuitBreaker:
+    # closed -> open after `failure_threshold` failed attempts in a row;
+    # open -> half-open after `reset_timeout`, letting one trial call through;
+    # the trial's outcome closes or re-opens it
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.short_circuits = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = "half-open"
+            if self.state == "open" or (self.state == "half-open" and self._trial_running):
+                self.short_circuits += 1
+                raise CircuitOpen("AI service is unavailable right now; using offline responses")
+            if self.state == "half-open":
+                self._trial_running = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+
+
+def _make_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update(headers)
+    return session
+
+
+session = _make_session()
+breaker = CircuitBreaker(
+    failure_threshold=int(os.getenv("HUGGINGFACE_BREAKER_THRESHOLD", "5")),
+    reset_timeout=float(os.getenv("HUGGINGFACE_BREAKER_RESET", "30")),
+)
+cache = ResponseCache(max_entries=CACHE_SIZE, ttl=CACHE_TTL)
+counters = {"requests": 0, "retries": 0, "failures": 0}
+_counters_lock = threading.Lock()
+
+
+def _count(name):
+    with _counters_lock:
+        counters[name] += 1
+
+
+def stats():
+    return {
+        **counters,
+        "breaker": breaker.state,
+        "short_circuits": breaker.short_circuits,
+        "cache": cache.stats(),
+    }
+
+
+def build_payload(text):
+    return {
+        "inputs": text,
+        "options": {
+            "wait_for_model": True
+        }
+    }
+
+
+def retry_hint(response):
+    # Seconds the API asked us to wait: Retry-After header or 503 estimated_time
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        pass
+    try:
+        return float(response.json().get("estimated_time"))
+    except (ValueError, TypeError, AttributeError):
+        return None
+
+
+def backoff_delay(attempt, hint=None):
+    # Full jitter, but never sooner than the server's own estimate
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+    if hint is not None:
+        delay = min(hint, BACKOFF_CAP) + delay / 2
+    return delay
+
+
+def _post(payload, timeout=None, deadline=None, stream=False):
+    # POSTs with retries and the circuit breaker; returns the 200 response.
+    # `deadline` bounds the whole call, retries included.
+    expires = None if deadline is None else time.monotonic() + deadline
+    attempt = 0
+    while True:
+        breaker.allow()
+        request_timeout = timeout
+        if expires is not None:
+            remaining = max(expires - time.monotonic(), 0.001)
+            request_timeout = remaining if timeout is None else min(timeout, remaining)
+
+        _count("requests")
+        hint = None
+        try:
+            response = session.post(API_URL, json=payload, timeout=request_timeout, stream=stream)
+        except requests.RequestException as e:
+            # Connection errors, timeouts, broken chunked bodies, redirect loops...
+            error = e
+        except BaseException:
+            # Anything else still ends a half-open trial, or the breaker would stay shut
+            breaker.record_failure()
+            raise
+        else:
+            if response.status_code == 200:
+                breaker.record_success()
+                return response
+            if response.status_code not in RETRY_STATUSES:
+                # The endpoint is up; the request itself is wrong, so retrying won't help
+                breaker.record_success()
+                response.close()
+                raise BadRequest(f"API Error: Status code {response.status_code}")
+            hint = retry_hint(response)
+            response.close()
+            if response.status_code == 503:
+                error = ModelLoading("Model is loading... Please try again in a few seconds.")
+            else:
+                error = HFError(f"API Error: Status code {response.status_code}")
+
+        _count("failures")
+        breaker.record_failure()
+        delay = backoff_delay(attempt, hint)
+        if attempt >= MAX_RETRIES or (expires is not None and time.monotonic() + delay >= expires):
+            raise error
+        _count("retries")
+        time.sleep(delay)
+        attempt += 1
+
+
+def _generated_text(result):
+    if isinstance(result, list) and result:
+        return result[0].get('generated_text', '')
+    return None
+
+
+def generate(text, timeout=None, deadline=None):
+    # Returns the generated text, or None when the API answered without any
+    return _generated_text(_post(build_payload(text), timeout, deadline).json())
+
+
+def cached_generate(text, timeout=None, deadline=None):
+    # Same contract as generate; the cache key includes the model URL
+    key = cache_key(API_URL, build_payload(text))
+    try:
+        return cache.get_or_compute(key, lambda: generate(text, timeout, deadline), timeout=deadline)
+    except TimeoutError:
+        raise DeadlineExceeded(f"No answer within {deadline:g}s")
+
+
+def generate_many(prompts, deadline=20.0):
+    # prompts: {name: text}. Yields (name, text, error) in completion order;
+    # anything still running at the deadline is yielded with DeadlineExceeded.
+    futures = {
+        _executor.submit(cached_generate, text, deadline=deadline): name
+        for name, text in prompts.items()
+    }
+    pending = set(futures)
+    try:
+        for future in as_completed(futures, timeout=deadline):
+            pending.discard(future)
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
+    except FutureTimeoutError:
+        pass
+    for future in pending:
+        future.cancel()
+        yield futures[future], None, DeadlineExceeded(f"No answer within {deadline:g}s")
+
+
+def iter_sse(response):
+    # Yields the JSON payload of each `data:` event of a server-sent-event stream
+    # Event streams are always UTF-8; without a charset requests would guess ISO-8859-1
+    response.encoding = "utf-8"
+    data = []
+    for line in response.iter_lines(decode_unicode=True):
+        if line:
+            if line.startswith("data:"):
+                data.append(line[5:].lstrip())
+            continue
+        # A blank line ends the event
+        if data:
+            event, data = "\n".join(data), []
+            if event == "[DONE]":
+                return
+            yield json.loads(event)
+    if data and data != ["[DONE]"]:
+        yield json.loads("\n".join(data))
+
+
+def generate_stream(text, timeout=None, deadline=None):
+    # Yields pieces of generated text as they arrive; joined, they are the answer.
+    # Shares cache entries with cached_generate (same key, without "stream"), and
+    # identical prompts already in flight either way are waited on instead of
+    # sent again: the caller then gets the whole answer as one piece.
+    key = cache_key(API_URL, build_payload(text))
+    cached, future, leader = cache.claim(key)
+    if cached is not None:
+        yield cached
+        return
+    if not leader:
+        try:
+            result = cache.wait(future, timeout=deadline)
+        except TimeoutError:
+            raise DeadlineExceeded(f"No answer within {deadline:g}s")
+        if result:
+            yield result
+        return
+
+    pieces = []
+    try:
+        for piece in _stream(text, timeout, deadline):
+            pieces.append(piece)
+            yield piece
+    except BaseException as e:
+        # A consumer that stops early (GeneratorExit) still has to release the waiters
+        cache.fail(key, future, e if isinstance(e, Exception) else HFError("Stream stopped before it finished"))
+        raise
+    cache.resolve(key, future, "".join(pieces) or None)
+
+
+def _stream(text, timeout=None, deadline=None):
+    # The upstream half of generate_stream, without the cache
+    expires = None if deadline is None else time.monotonic() + deadline
+    try:
+        response = _post({**build_payload(text), "stream": True}, timeout, deadline, stream=True)
+    except BadRequest:
+        # This endpoint doesn't stream; ask for the whole answer instead
+        result = generate(text, timeout, deadline)
+        if result:
+            yield result
+        return
+
+    with response:
+        if not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+            # Streaming flag ignored: the whole answer came back as plain JSON
+            result = _generated_text(response.json())
+            if result:
+                yield result
+            return
+        for event in iter_sse(response):
+            if "error" in event:
+                raise HFError(f"API Error: {event['error']}")
+            token = event.get("token") or {}
+            if token.get("text") and not token.get("special"):
+                yield token["text"]
+            if expires is not None and time.monotonic() >= expires:
+                raise DeadlineExceeded(f"Stream not finished within {deadline:g}s")
+
+
+def stream_many(prompts, deadline=20.0):
+    # prompts: {name: text}. Streams them all at once and yields
+    # (name, text so far, finished, error) as text arrives. Tokens that queue
+    # up while the caller is rendering are merged into one update per prompt.
+    updates = queue.Queue()
+
+    def run(name, text):
+        try:
+            for piece in generate_stream(text, deadline=deadline):
+                updates.put((name, piece, False, None))
+        except Exception as e:
+            updates.put((name, "", True, e))
+        else:
+            updates.put((name, "", True, None))
+
+    for name, text in prompts.items():
+        _executor.submit(run, name, text)
+
+    texts = dict.fromkeys(prompts, "")
+    pending = set(prompts)
+    expires = time.monotonic() + deadline
+    while pending:
+        try:
+            batch = [updates.get(timeout=max(expires - time.monotonic(), 0))]
+        except queue.Empty:
+            break
+        while True:
+            try:
+                batch.append(updates.get_nowait())
+            except queue.Empty:
+                break
+        changed = {}
+        for name, piece, finished, error in batch:
+            if name not in pending:
+                continue
+            texts[name] += piece
+            changed[name] = (finished, error)
+            if finished:
+                pending.discard(name)
+        for name, (finished, error) in changed.items():
+            yield name, texts[name], finished, error
+    for name in pending:
+        yield name, texts[name], True, DeadlineExceeded(f"No answer within {deadline:g}s")
+
+
+def get_fallback_response(prompt):
+    responses = {
+        "mission": [
+            "Embark on a cosmic journey of continuous learning and growth.",
+            "Push beyond your current limits and explore new galaxies of possibility.",
+            "Transform challenges into stars to navigate by in your advancement."
+        ],
+        "challenge": [
+            "Break down your mission into daily interstellar explorations.",
+            "Track your progress like a space mission - one milestone at a time.",
+            "Maintain mission logs to document your cosmic growth journey."
+        ],
+        "motivation": [
+            "The universe of possibilities awaits your exploration, brave astronaut.",
+            "Every small step is a light-year leap toward your greater potential.",
+            "Your growth journey spans galaxies of opportunity."
+        ]
+    }
+
+    if "mission" in prompt.lower():
+        return random.choice(responses["mission"])
+    elif "challenge" in prompt.lower():
+        return random.choice(responses["challenge"])
+    else:
+        return random.choice(responses["motivation"])
@@ -1,10 +1,12 @@
 import streamlit as st
 from dotenv import load_dotenv
-import requests
 import os
 import random
-import time
 import json
+import hf_client
+from progress_store import DEFAULT_DAYS, ProgressStore, days_done
+from hf_client import (CircuitOpen, HFError, ModelLoading, generate, generate_many,
+                       get_fallback_response, stream_many)
 
 # Load environment variables
 load_dotenv()
@@ -192,70 +194,55 @@ st.markdown("""
 # Add creator signature
 st.markdown('<div class="creator-signature">Created by Ubaid Raza</div>', unsafe_allow_html=True)
 
-# Hugging Face API setup
-API_URL = "https://api-inference.huggingface.co/models/facebook/opt-350m"
+@st.cache_resource
+def get_progress_store():
+    # One SQLite progress store for the whole server, survives restarts
+    return ProgressStore(os.getenv("PROGRESS_DB", "progress.db"))
 
-import os
-headers = {"Authorization": f"Bearer {os.getenv('HUGGINGFACE_TOKEN')}"}
-from dotenv import load_dotenv
-import os
+progress_store = get_progress_store()
 
-# Load .env file
-load_dotenv()
+# Hugging Face API setup
+MISSION_DEADLINE = float(os.getenv("HUGGINGFACE_DEADLINE", "20"))
 
-# Access the token
-token = os.getenv("HUGGINGFACE_TOKEN")
-headers = {"Authorization": f"Bearer {token}"}
+def resolve_response(text, result=None, error=None):
+    # Shows what went wrong (on the script thread) and falls back to a canned answer
+    if isinstance(error, (ModelLoading, CircuitOpen)):
+        st.warning(str(error))
+    elif isinstance(error, HFError):
+        st.error(str(error))
+    elif error is not None:
+        st.error(f"Error: {str(error)}")
+    if error is not None or result is None:
+        return get_fallback_response(text)
+    return result
 
-def query_huggingface(payload):
-    try:
-        # Simplify payload
-        if isinstance(payload, dict):
-            text = payload.get('inputs', '')
-        else:
-            text = str(payload)
-            
-        simple_payload = {
-            "inputs": text,
-            "options": {
-                "wait_for_model": True
-            }
-        }
-        
-        # Make API request
-        response = requests.post(API_URL, headers=headers, json=simple_payload)
-        
-        # Handle different response cases
-        if response.status_code == 200:
-            result = response.json()
-            if isinstance(result, list) and result:
-                return result[0].get('generated_text', '')
-            return get_fallback_response(text)
-            
-        elif response.status_code == 503:
-            st.warning("Model is loading... Please try again in a few seconds.")
-            time.sleep(5)  # Wait for model to load
-            return get_fallback_response(text)
-            
+def render_card(slot, name, text, cursor=""):
+    # Draws one mission card into its placeholder; redrawn as streamed text grows
+    with slot.container():
+        if name == "cosmic_wisdom":
+            st.markdown("<div class='quote-box'>", unsafe_allow_html=True)
+            st.write(f"💫 *{text}{cursor}*")
+            st.markdown("</div>", unsafe_allow_html=True)
         else:
-            st.error(f"API Error: Status code {response.status_code}")
-            return get_fallback_response(text)
-            
-    except Exception as e:
-        st.error(f"Error: {str(e)}")
-        return get_fallback_response(text)
+            st.markdown("<div class='mission-card'>", unsafe_allow_html=True)
+            st.subheader("🌠 Mission Objectives" if name == "refined_mission" else "📡 30-Day Flight Plan")
+            st.write(text + cursor)
+            st.markdown("</div>", unsafe_allow_html=True)
 
 def test_api_connection():
     try:
-        test_response = query_huggingface("Generate a short motivational message")
-        if test_response and not test_response.startswith("API Error"):
+        if generate("Generate a short motivational message", deadline=MISSION_DEADLINE) is not None:
             return True, "API connection successful!"
         return False, "API connection failed"
+    except HFError as e:
+        return False, str(e)
     except Exception as e:
         return False, f"Connection Error: {str(e)}"
 
 # Add this at the start of your app to test the connection
 with st.sidebar:
+    stream_responses = st.toggle("Stream AI responses", value=hf_client.STREAM,
+                                 help="Show text as it is generated instead of waiting for the full answer")
     if st.button("🔄 Test API Connection"):
         with st.spinner("Testing API connection..."):
             is_connected, message = test_api_connection()
@@ -264,37 +251,11 @@ with st.sidebar:
             else:
                 st.error(message)
 
-def get_fallback_response(prompt):
-    responses = {
-        "mission": [
-            "Embark on a cosmic journey of continuous learning and growth.",
-            "Push beyond your current limits and explore new galaxies of possibility.",
-            "Transform challenges into stars to navigate by in your advancement."
-        ],
-        "challenge": [
-            "Break down your mission into daily interstellar explorations.",
-            "Track your progress like a space mission - one milestone at a time.",
-            "Maintain mission logs to document your cosmic growth journey."
-        ],
-        "motivation": [
-            "The universe of possibilities awaits your exploration, brave astronaut.",
-            "Every small step is a light-year leap toward your greater potential.",
-            "Your growth journey spans galaxies of opportunity."
-        ]
-    }
-    
-    if "mission" in prompt.lower():
-        return random.choice(responses["mission"])
-    elif "challenge" in prompt.lower():
-        return random.choice(responses["challenge"])
-    else:
-        return random.choice(responses["motivation"])
-
 # Sidebar for Explorer Profile
 with st.sidebar:
     st.title("🚀 Mission Control")
-    if 'explorer_name' not in st.session_state:
-        st.session_state.explorer_name = st.text_input("Enter Explorer Name:", "Cosmic Pioneer")
+    # Rendered on every run; the widget keeps st.session_state.explorer_name up to date
+    st.text_input("Enter Explorer Name:", "Cosmic Pioneer", key="explorer_name")
     
     st.subheader("Mission Stats")
     if 'missions_completed' not in st.session_state:
@@ -302,6 +263,13 @@ with st.sidebar:
     
     st.metric("Missions Launched", st.session_state.missions_completed)
     
+    # Shared by every session in this server process
+    cache_stats = hf_client.stats()["cache"]
+    with st.expander("AI response cache"):
+        st.metric("Hit rate", f"{cache_stats['hit_rate']:.0%}")
+        st.caption(f"{cache_stats['saved_calls']} of {cache_stats['lookups']} requests answered without calling the API "
+                   f"({cache_stats['coalesced']} shared an in-flight call), {cache_stats['entries']} responses cached")
+    
     # Achievement ranks
     st.subheader("Explorer Rank")
     ranks = {
@@ -317,6 +285,16 @@ with st.sidebar:
     if current_rank > 0:
         st.markdown(f"<div class='achievement-badge'>{ranks[current_rank]}</div>", 
                    unsafe_allow_html=True)
+    
+    # Across every explorer in the progress store
+    with st.expander("🏆 Leaderboard"):
+        rank_by = st.radio("Rank by", ["completed", "streak"], horizontal=True,
+                           format_func=lambda by: "Days completed" if by == "completed" else "Best streak")
+        for position, row in enumerate(progress_store.leaderboard(limit=5, by=rank_by), 1):
+            st.write(f"{position}. {row['explorer']}: {row[rank_by]}")
+        explorer_rank = progress_store.rank(st.session_state.explorer_name, by=rank_by)
+        if explorer_rank is not None:
+            st.caption(f"You are #{explorer_rank}")
 
 # Main Mission Control
 st.title("🌌 Cosmic Growth Explorer")
@@ -331,59 +309,79 @@ with st.container():
     if st.button("Initialize Mission Plan"):
         if mission:
             with st.spinner("Calculating interstellar mission parameters..."):
-                # Get AI responses
-                refined_mission = query_huggingface({"inputs": f"Refine this cosmic growth mission: {mission}"})
-                strategy = query_huggingface({"inputs": f"Create a 30-day interstellar strategy for: {mission}"})
-                cosmic_wisdom = query_huggingface({"inputs": "Share profound cosmic wisdom about growth and space exploration"})
+                # Get AI responses: all three requests run at once, each card fills in as it lands
+                prompts = {
+                    "refined_mission": f"Refine this cosmic growth mission: {mission}",
+                    "strategy": f"Create a 30-day interstellar strategy for: {mission}",
+                    "cosmic_wisdom": "Share profound cosmic wisdom about growth and space exploration",
+                }
                 
                 # Display mission briefing
                 col1, col2 = st.columns(2)
+                slots = {
+                    "refined_mission": col1.empty(),
+                    "strategy": col2.empty(),
+                    "cosmic_wisdom": st.empty(),
+                }
+                for slot in slots.values():
+                    slot.info("📡 Awaiting transmission...")
                 
-                with col1:
-                    st.markdown("<div class='mission-card'>", unsafe_allow_html=True)
-                    st.subheader("🌠 Mission Objectives")
-                    st.write(refined_mission)
-                    st.markdown("</div>", unsafe_allow_html=True)
-                
-                with col2:
-                    st.markdown("<div class='mission-card'>", unsafe_allow_html=True)
-                    st.subheader("📡 30-Day Flight Plan")
-                    st.write(strategy)
-                    st.markdown("</div>", unsafe_allow_html=True)
-                
-                st.markdown("<div class='quote-box'>", unsafe_allow_html=True)
-                st.write(f"💫 *{cosmic_wisdom}*")
-                st.markdown("</div>", unsafe_allow_html=True)
+                if stream_responses:
+                    # Tokens are written into the cards as they arrive
+                    for name, text, finished, error in stream_many(prompts, deadline=MISSION_DEADLINE):
+                        if not finished:
+                            render_card(slots[name], name, text, cursor="▌")
+                        elif error is not None and text:
+                            # Keep what already streamed in rather than swapping in a canned answer
+                            st.warning(f"Transmission cut short: {error}")
+                            render_card(slots[name], name, text)
+                        else:
+                            render_card(slots[name], name, resolve_response(prompts[name], text or None, error))
+                else:
+                    for name, result, error in generate_many(prompts, deadline=MISSION_DEADLINE):
+                        render_card(slots[name], name, resolve_response(prompts[name], result, error))
                 
                 st.session_state.missions_completed += 1
+                # Track the new mission's 30 days from now on
+                progress_store.start_mission(st.session_state.explorer_name, mission)
+                st.session_state.tracked_mission = mission
         else:
             st.warning("Please define your mission objectives!")
 
-# Mission Progress Tracking
-if 'mission_progress' not in st.session_state:
-    st.session_state.mission_progress = [False] * 30
+# Mission Progress Tracking (kept per explorer and mission in the progress store)
+DEFAULT_MISSION = "Daily Growth"
+
+def toggle_day(explorer, mission, day):
+    # Runs before the rerun that the click triggers, so that rerun already sees the new bit
+    progress_store.set_day(explorer, mission, day, st.session_state[f"day_{mission}_{day}"])
 
 st.header("📡 Mission Progress Tracker")
 
+explorer = st.session_state.explorer_name
+mission_names = sorted(m["mission"] for m in progress_store.missions(explorer)) or [DEFAULT_MISSION]
+if st.session_state.get("tracked_mission") not in mission_names:
+    st.session_state.pop("tracked_mission", None)
+tracked_mission = st.selectbox("Tracking mission", mission_names, key="tracked_mission")
+progress = progress_store.get(explorer, tracked_mission)
+mission_progress = days_done(progress, DEFAULT_DAYS)
+
 # Create an interactive space journey tracker
 progress_cols = st.columns(10)
-for i in range(30):
+for i in range(DEFAULT_DAYS):
     col_index = i % 10
     with progress_cols[col_index]:
-        milestone_class = "progress-milestone milestone-active" if st.session_state.mission_progress[i] else "progress-milestone"
+        milestone_class = "progress-milestone milestone-active" if mission_progress[i] else "progress-milestone"
         st.markdown(f"<div class='{milestone_class}'>", unsafe_allow_html=True)
-        day_complete = st.checkbox(f"D{i+1}", value=st.session_state.mission_progress[i], key=f"day_{i}", label_visibility="collapsed")
+        st.checkbox(f"D{i+1}", value=mission_progress[i], key=f"day_{tracked_mission}_{i}",
+                    label_visibility="collapsed", on_change=toggle_day, args=(explorer, tracked_mission, i))
         st.markdown("</div>", unsafe_allow_html=True)
-        if day_complete != st.session_state.mission_progress[i]:
-            st.session_state.mission_progress[i] = day_complete
-            st.rerun()
 
 # Progress visualization
-completed = sum(st.session_state.mission_progress)
-progress_percentage = (completed / 30) * 100
+completed = progress.bit_count()
+progress_percentage = (completed / DEFAULT_DAYS) * 100
 
 st.progress(progress_percentage / 100)
-st.write(f"🌠 Mission Progress: {completed}/30 milestones achieved! ({progress_percentage:.1f}%)")
+st.write(f"🌠 Mission Progress: {completed}/{DEFAULT_DAYS} milestones achieved! ({progress_percentage:.1f}%)")
 
 # Mission Status
 if progress_percentage == 100:
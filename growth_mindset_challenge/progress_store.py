@@ -0,0 +1,185 @@
+# Persistent mission progress, shared by every session
+#
+# Each (explorer, mission) row keeps its days as one integer bitset: bit i set
+# means day i + 1 is done, so a 30-day mission is a single 4-byte SQLite
+# integer instead of a list of 30 bools. Ticking a day is one UPSERT that ORs
+# or clears a single bit; the same statement refreshes the row's completed-day
+# count and longest streak through two small Python SQL functions.
+#
+# Triggers keep an `explorers` summary table (total days done, best streak,
+# mission count) in step with the missions table, so leaderboards and ranks
+# are index lookups instead of a GROUP BY over every mission.
+
+import sqlite3
+import threading
+from datetime import datetime
+
+DEFAULT_DAYS = 30
+MAX_DAYS = 63  # bitsets are stored as signed 64-bit SQLite integers
+RANK_COLUMNS = {"completed": "total_completed", "streak": "best_streak"}
+
+
+def longest_streak(progress):
+    # Each round shortens every run of set bits by one; the rounds until
+    # nothing is left is the longest run
+    streak = 0
+    while progress:
+        progress &= progress >> 1
+        streak += 1
+    return streak
+
+
+def days_done(progress, days=DEFAULT_DAYS):
+    return [bool(progress >> day & 1) for day in range(days)]
+
+
+class ProgressStore:
+    def __init__(self, file_path="progress.db"):
+        self.file_path = file_path
+        self.conn = sqlite3.connect(file_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.create_function("bit_count", 1, lambda value: value.bit_count(), deterministic=True)
+        self.conn.create_function("longest_streak", 1, longest_streak, deterministic=True)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS missions (
+                explorer TEXT NOT NULL,
+                mission TEXT NOT NULL,
+                days INTEGER NOT NULL DEFAULT 30,
+                progress INTEGER NOT NULL DEFAULT 0,
+                completed INTEGER NOT NULL DEFAULT 0,
+                streak INTEGER NOT NULL DEFAULT 0,
+                updated_at TEXT,
+                PRIMARY KEY (explorer, mission)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS explorers (
+                explorer TEXT PRIMARY KEY,
+                missions INTEGER NOT NULL DEFAULT 0,
+                total_completed INTEGER NOT NULL DEFAULT 0,
+                best_streak INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_explorers_completed ON explorers (total_completed DESC);
+            CREATE INDEX IF NOT EXISTS idx_explorers_streak ON explorers (best_streak DESC);
+
+            CREATE TRIGGER IF NOT EXISTS missions_insert AFTER INSERT ON missions BEGIN
+                INSERT INTO explorers (explorer) VALUES (NEW.explorer) ON CONFLICT DO NOTHING;
+                UPDATE explorers SET missions = missions + 1,
+                                     total_completed = total_completed + NEW.completed,
+                                     best_streak = max(best_streak, NEW.streak)
+                 WHERE explorer = NEW.explorer;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS missions_update AFTER UPDATE OF progress ON missions BEGIN
+                UPDATE explorers SET total_completed = total_completed + NEW.completed - OLD.completed,
+                                     best_streak = (SELECT max(streak) FROM missions WHERE explorer = NEW.explorer)
+                 WHERE explorer = NEW.explorer;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS missions_delete AFTER DELETE ON missions BEGIN
+                UPDATE explorers SET missions = missions - 1,
+                                     total_completed = total_completed - OLD.completed,
+                                     best_streak = coalesce((SELECT max(streak) FROM missions
+                                                             WHERE explorer = OLD.explorer), 0)
+                 WHERE explorer = OLD.explorer;
+                DELETE FROM explorers WHERE explorer = OLD.explorer AND missions = 0;
+            END;
+        """)
+        # One connection is shared by every Streamlit session
+        self._lock = threading.Lock()
+
+    def start_mission(self, explorer, mission, days=DEFAULT_DAYS):
+        # Does nothing if the explorer already has this mission
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO missions (explorer, mission, days, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT DO NOTHING",
+                (explorer, mission, days, self._now()),
+            )
+
+    def set_day(self, explorer, mission, day, done=True):
+        # `day` is 0-based; touches one bit and returns the mission's new bitset
+        if not 0 <= day < MAX_DAYS:
+            raise ValueError(f"day must be between 0 and {MAX_DAYS - 1}")
+        bit = 1 << day
+        new_progress = "progress | :bit" if done else "progress & ~:bit"
+        with self._lock, self.conn:
+            row = self.conn.execute(f"""
+                INSERT INTO missions (explorer, mission, days, progress, completed, streak, updated_at)
+                VALUES (:explorer, :mission, :days, :start, bit_count(:start), longest_streak(:start), :now)
+                ON CONFLICT DO UPDATE SET progress = {new_progress},
+                                          completed = bit_count({new_progress}),
+                                          streak = longest_streak({new_progress}),
+                                          updated_at = :now
+                RETURNING progress
+            """, {
+                "explorer": explorer, "mission": mission, "days": max(DEFAULT_DAYS, day + 1),
+                "bit": bit, "start": bit if done else 0, "now": self._now(),
+            }).fetchone()
+        return row[0]
+
+    def set_progress(self, explorer, mission, progress, days=DEFAULT_DAYS):
+        # Replaces the whole bitset, e.g. to reset a mission
+        with self._lock, self.conn:
+            self.conn.execute("""
+                INSERT INTO missions (explorer, mission, days, progress, completed, streak, updated_at)
+                VALUES (:explorer, :mission, :days, :progress, bit_count(:progress), longest_streak(:progress), :now)
+                ON CONFLICT DO UPDATE SET progress = :progress,
+                                          completed = bit_count(:progress),
+                                          streak = longest_streak(:progress),
+                                          updated_at = :now
+            """, {"explorer": explorer, "mission": mission, "days": days, "progress": progress, "now": self._now()})
+
+    def get(self, explorer, mission):
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT progress FROM missions WHERE explorer = ? AND mission = ?", (explorer, mission)
+            ).fetchone()
+        return row[0] if row else 0
+
+    def missions(self, explorer):
+        # Most recently touched first
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT mission, days, progress, completed, streak, updated_at FROM missions "
+                "WHERE explorer = ? ORDER BY updated_at DESC",
+                (explorer,),
+            ).fetchall()
+        keys = ("mission", "days", "progress", "completed", "streak", "updated_at")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def remove_mission(self, explorer, mission):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM missions WHERE explorer = ? AND mission = ?", (explorer, mission))
+
+    def leaderboard(self, limit=10, by="completed"):
+        column = RANK_COLUMNS[by]
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT explorer, total_completed, best_streak, missions FROM explorers "
+                f"ORDER BY {column} DESC LIMIT ?",
+                (limit,),
+            ).fetchall()
+        keys = ("explorer", "completed", "streak", "missions")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def rank(self, explorer, by="completed"):
+        # 1-based; explorers with the same score share a rank. None if unknown.
+        column = RANK_COLUMNS[by]
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT {column} FROM explorers WHERE explorer = ?", (explorer,)
+            ).fetchone()
+            if row is None:
+                return None
+            ahead = self.conn.execute(
+                f"SELECT count(*) FROM explorers WHERE {column} > ?", (row[0],)
+            ).fetchone()[0]
+        return ahead + 1
+
+    def close(self):
+        self.conn.close()
+
+    @staticmethod
+    def _now():
+        return datetime.now().isoformat(timespec="seconds")
@@ -0,0 +1,112 @@
+# In-process cache for Hugging Face responses
+#
+# Entries are keyed on (model URL, payload), live for `ttl` seconds and the
+# least recently used one is evicted once there are more than `max_entries`.
+# Lookups are single-flight: if the same key is already being fetched, later
+# callers wait on the first caller's result instead of sending their own
+# request. Errors are handed to everyone waiting but never cached, so the next
+# call tries the API again.
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+def cache_key(model, payload):
+    return model, json.dumps(payload, sort_keys=True)
+
+
+class ResponseCache:
+    def __init__(self, max_entries=256, ttl=3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires at, value)
+        self._in_flight = {}  # key -> Future of the call fetching it
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute, timeout=None):
+        # `timeout` only bounds how long a coalesced caller waits for the leader
+        value, future, leader = self.claim(key)
+        if value is not None:
+            return value
+        if not leader:
+            return self.wait(future, timeout)
+        try:
+            value = compute()
+        except BaseException as e:
+            self.fail(key, future, e)
+            raise
+        self.resolve(key, future, value)
+        return value
+
+    # The steps of get_or_compute, for a leader that hands its value out in
+    # pieces while it is produced (streams). claim() returns (cached value,
+    # None, False) on a hit, else (None, future, leader); the leader must end
+    # with resolve() or fail(), everyone else waits on the future.
+    def claim(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], None, False
+                del self._entries[key]
+            future = self._in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return None, future, False
+            future = self._in_flight[key] = Future()
+            self.misses += 1
+            return None, future, True
+
+    def wait(self, future, timeout=None):
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            raise TimeoutError("Timed out waiting for an identical request already in flight")
+
+    def resolve(self, key, future, value):
+        with self._lock:
+            del self._in_flight[key]
+            if value is not None:
+                self._store(key, value)
+        future.set_result(value)
+
+    def fail(self, key, future, error):
+        with self._lock:
+            del self._in_flight[key]
+        future.set_exception(error)
+
+    def _store(self, key, value):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            saved = self.hits + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "lookups": lookups,
+                "hits": self.hits,
+                "coalesced": self.coalesced,
+                "upstream_calls": self.misses,
+                "saved_calls": saved,
+                "hit_rate": saved / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
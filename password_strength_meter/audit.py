@@ -0,0 +1,119 @@
+# Bulk password audit
+#
+# Streams a file of candidate passwords (one per line), scores them on a
+# process pool in chunks, and writes per-row results plus a score histogram.
+# Plaintext passwords are never written out; rows are identified by line number.
+#
+# Usage: python audit.py passwords.txt --output results.csv --histogram histogram.json
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter, deque
+from itertools import islice
+from multiprocessing import Pool
+
+from scoring import PasswordScorer, compile_dictionary, get_strength_color
+
+_scorer = None
+
+
+def _init_worker(dictionary_paths=()):
+    global _scorer
+    dictionaries = {"organisation": compile_dictionary(dictionary_paths)} if dictionary_paths else None
+    _scorer = PasswordScorer(dictionaries=dictionaries)
+
+
+def score_chunk(chunk):
+    # chunk is a list of (line_number, password); returns rows without plaintext
+    rows = []
+    for line_number, password in chunk:
+        score, _ = _scorer.score(password)
+        _, label = get_strength_color(score)
+        rows.append((line_number, len(password), score, label))
+    return rows
+
+
+def read_chunks(path, chunk_size):
+    with open(path, "r", encoding="utf-8", errors="replace") as file:
+        numbered = (
+            (line_number, line.rstrip("\r\n"))
+            for line_number, line in enumerate(file, start=1)
+        )
+        passwords = ((n, p) for n, p in numbered if p)
+        while True:
+            chunk = list(islice(passwords, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def run_audit(input_path, output_path=None, workers=None, chunk_size=1000, dictionary_paths=()):
+    histogram = Counter()
+    total = 0
+    output = open(output_path, "w", newline="") if output_path else None
+    writer = csv.writer(output) if output else None
+    if writer:
+        writer.writerow(["line", "length", "score", "strength"])
+
+    def collect(rows):
+        nonlocal total
+        for row in rows:
+            histogram[row[2]] += 1
+        if writer:
+            writer.writerows(rows)
+        total += len(rows)
+
+    workers = workers or os.cpu_count() or 1
+    try:
+        with Pool(processes=workers, initializer=_init_worker, initargs=(tuple(dictionary_paths),)) as pool:
+            # Pool.imap would read the whole file ahead; a fixed window of pending
+            # chunks keeps memory bounded and rows in input order
+            pending = deque()
+            for chunk in read_chunks(input_path, chunk_size):
+                pending.append(pool.apply_async(score_chunk, (chunk,)))
+                if len(pending) >= workers * 4:
+                    collect(pending.popleft().get())
+            while pending:
+                collect(pending.popleft().get())
+    finally:
+        if output:
+            output.close()
+
+    return total, {score: histogram.get(score, 0) for score in range(5)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a file of passwords in bulk.")
+    parser.add_argument("input", help="text file with one password per line")
+    parser.add_argument("--output", help="CSV file for per-row results")
+    parser.add_argument("--histogram", help="JSON file for the score histogram")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="passwords per work unit")
+    parser.add_argument("--dictionary", action="append", default=[],
+                        help="organisation word list to penalize (repeatable)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    total, histogram = run_audit(
+        args.input, args.output, args.workers, args.chunk_size, args.dictionary
+    )
+    elapsed = time.perf_counter() - start
+
+    if args.histogram:
+        with open(args.histogram, "w") as file:
+            json.dump({"total": total, "scores": histogram}, file, indent=4)
+
+    print(f"Scored {total:,} passwords in {elapsed:.2f}s ({total / elapsed if elapsed else 0:,.0f}/s)")
+    for score, count in histogram.items():
+        _, label = get_strength_color(score)
+        share = count / total if total else 0
+        print(f"  {score} {label:<16} {count:>10,} {share:>7.1%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+# Latency of password scoring by input length
+# Run with: python benchmark.py
+import os
+import random
+import string
+import tempfile
+import time
+
+from audit import run_audit
+from breach_filter import BreachFilter, build_filter
+
+from scoring import MAX_ANALYSIS_LENGTH, PasswordScorer, analyse, compile_dictionary, find_matches
+
+
+def _timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+def bench_scoring_by_length(lengths=(8, 16, 32, 64, 128, 256), repeats=5):
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + string.digits + "!@#$%"
+    print(f"{'length':>6} {'full zxcvbn':>12} {'capped':>9} {'append':>9} {'cached':>9}  (ms)")
+    for length in lengths:
+        password = "".join(rng.choice(alphabet) for _ in range(length))
+
+        # Baseline: uncapped full analysis, as zxcvbn itself does
+        full = _timed(lambda: analyse(password, find_matches(password)), repeats)
+
+        capped = _timed(lambda: PasswordScorer().score(password), repeats)
+
+        # Typing one more character after the previous value was scored. Each
+        # iteration uses a different password that differs inside the analysed
+        # prefix, so inputs past the cap measure incremental matching and not
+        # a cache hit on the unchanged first MAX_ANALYSIS_LENGTH characters.
+        def append_one(seed):
+            variant = "".join(random.Random(seed).choice(alphabet) for _ in range(length))
+            analysed = variant[:MAX_ANALYSIS_LENGTH]
+            scorer, state = PasswordScorer(), {}
+            scorer.score(analysed[:-1], state)
+            start = time.perf_counter()
+            scorer.score(analysed, state)
+            elapsed = time.perf_counter() - start
+            assert scorer.stats()["incremental"] == 1
+            return elapsed
+        append = sum(append_one(seed) for seed in range(repeats)) / repeats * 1000
+
+        warm = PasswordScorer()
+        warm.score(password)
+        cached = _timed(lambda: warm.score(password), repeats)
+
+        print(f"{length:>6} {full:>12.2f} {capped:>9.2f} {append:>9.2f} {cached:>9.3f}")
+    print(f"(inputs longer than {MAX_ANALYSIS_LENGTH} characters are analysed up to the cap)")
+
+
+def bench_audit_scaling(rows=20_000):
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + string.digits
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "passwords.txt")
+        with open(path, "w") as file:
+            for _ in range(rows):
+                file.write("".join(rng.choice(alphabet) for _ in range(rng.randint(6, 16))) + "\n")
+
+        cores = os.cpu_count() or 1
+        worker_counts = sorted({1, 2, 4, cores} & set(range(1, cores + 1)))
+        baseline = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            run_audit(path, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"Audit {rows:,} passwords with {workers} worker(s): {elapsed:.2f}s "
+                  f"({rows / elapsed:,.0f}/s, speedup {baseline / elapsed:.2f}x)")
+
+
+def bench_breach_filter(entries=1_000_000, fp_rate=0.001, lookups=100_000):
+    with tempfile.TemporaryDirectory() as tmp:
+        wordlist = os.path.join(tmp, "breached.txt")
+        with open(wordlist, "w") as file:
+            for i in range(entries):
+                file.write(f"leaked{i}\n")
+
+        output = os.path.join(tmp, "breached.bloom")
+        start = time.perf_counter()
+        bit_count, hash_count, _ = build_filter(wordlist, output, fp_rate, entries=entries)
+        build = time.perf_counter() - start
+        print(f"Breach filter build: {entries:,} entries in {build:.1f}s "
+              f"({entries / build:,.0f}/s), {bit_count / 8 / 1024 / 1024:.1f} MiB, {hash_count} hashes")
+
+        breach_filter = BreachFilter(output)
+        start = time.perf_counter()
+        for i in range(lookups):
+            f"leaked{i}" in breach_filter
+        hit = (time.perf_counter() - start) / lookups
+        start = time.perf_counter()
+        false_positives = sum(f"fresh{i}" in breach_filter for i in range(lookups))
+        miss = (time.perf_counter() - start) / lookups
+        print(f"Breach filter lookup: {hit * 1e6:.2f} µs (present), {miss * 1e6:.2f} µs (absent), "
+              f"observed false-positive rate {false_positives / lookups:.4%} "
+              f"(expected {breach_filter.false_positive_rate:.4%})")
+        breach_filter.close()
+
+
+def bench_org_dictionary(sizes=(0, 10_000, 100_000, 1_000_000), repeats=50):
+    rng = random.Random(0)
+    samples = ["".join(rng.choice(string.ascii_lowercase) for _ in range(12)) for _ in range(repeats)]
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f"org_{size}.txt")
+            with open(path, "w") as file:
+                for i in range(size):
+                    file.write(f"product{i}\n")
+
+            start = time.perf_counter()
+            dictionaries = {"organisation": compile_dictionary([path])} if size else None
+            compile_time = time.perf_counter() - start
+
+            scorer = PasswordScorer(dictionaries=dictionaries)
+            start = time.perf_counter()
+            for password in samples:
+                scorer.score(password + "product42")
+            per_call = (time.perf_counter() - start) / repeats
+            print(f"Org dictionary {size:>9,} words: compiled in {compile_time:.2f}s, "
+                  f"{per_call * 1000:.2f} ms per scoring call")
+
+
+if __name__ == "__main__":
+    bench_scoring_by_length()
+    bench_audit_scaling()
+    bench_breach_filter()
+    bench_org_dictionary()
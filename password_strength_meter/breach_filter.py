@@ -0,0 +1,133 @@
+# Offline breached-password check
+#
+# A wordlist of known-breached passwords is compiled once into a Bloom filter
+# file. At startup the file is memory-mapped read-only, so lookups touch only
+# k pages, cost O(k) and keep RSS flat however large the list is.
+#
+# Build:  python breach_filter.py build rockyou.txt breached.bloom --fp-rate 0.001
+#         python breach_filter.py build pwned-sha1.txt breached.bloom --format sha1
+# Check:  python breach_filter.py check breached.bloom "password123"
+
+import argparse
+import hashlib
+import math
+import mmap
+import struct
+import sys
+import time
+
+MAGIC = b"PWBLOOM1"
+HEADER = struct.Struct("<8sQIQ")  # magic, bit count, hash count, entry count
+
+
+def password_digest(password):
+    return hashlib.sha1(password.encode("utf-8", errors="surrogateescape")).digest()
+
+
+def _bit_positions(digest, bit_count, hash_count):
+    # Kirsch–Mitzenmacher double hashing over the SHA-1 digest
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:16], "little") | 1
+    return [(h1 + i * h2) % bit_count for i in range(hash_count)]
+
+
+def filter_parameters(entries, fp_rate):
+    bit_count = max(8, math.ceil(-entries * math.log(fp_rate) / (math.log(2) ** 2)))
+    hash_count = max(1, round(bit_count / max(entries, 1) * math.log(2)))
+    return bit_count, hash_count
+
+
+def iter_digests(path, fmt="plain"):
+    with open(path, "r", encoding="utf-8", errors="surrogateescape") as file:
+        for line in file:
+            line = line.rstrip("\r\n")
+            if not line:
+                continue
+            if fmt == "sha1":
+                # "HEXDIGEST" or "HEXDIGEST:count", as in the Pwned Passwords dumps
+                yield bytes.fromhex(line.split(":", 1)[0])
+            else:
+                yield password_digest(line)
+
+
+def build_filter(wordlist_path, output_path, fp_rate=0.001, fmt="plain", entries=None):
+    if entries is None:
+        with open(wordlist_path, "rb") as file:
+            entries = sum(1 for line in file if line.strip())
+
+    bit_count, hash_count = filter_parameters(entries, fp_rate)
+    bits = bytearray((bit_count + 7) // 8)
+    for digest in iter_digests(wordlist_path, fmt):
+        for position in _bit_positions(digest, bit_count, hash_count):
+            bits[position >> 3] |= 1 << (position & 7)
+
+    with open(output_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, bit_count, hash_count, entries))
+        file.write(bits)
+    return bit_count, hash_count, entries
+
+
+class BreachFilter:
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.bit_count, self.hash_count, self.entries = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a breached-password filter")
+
+    def __contains__(self, password):
+        return self.contains_digest(password_digest(password))
+
+    def contains_digest(self, digest):
+        data = self._map
+        offset = HEADER.size
+        for position in _bit_positions(digest, self.bit_count, self.hash_count):
+            if not data[offset + (position >> 3)] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def false_positive_rate(self):
+        # Expected rate for the number of entries the filter was built with
+        k, m, n = self.hash_count, self.bit_count, self.entries
+        return (1 - math.exp(-k * n / m)) ** k
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query a breached-password Bloom filter.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    build = commands.add_parser("build", help="compile a wordlist into a filter file")
+    build.add_argument("wordlist")
+    build.add_argument("output")
+    build.add_argument("--fp-rate", type=float, default=0.001, help="target false-positive rate")
+    build.add_argument("--format", choices=["plain", "sha1"], default="plain")
+    build.add_argument("--entries", type=int, help="entry count, to skip the counting pass")
+
+    check = commands.add_parser("check", help="look up passwords in a filter file")
+    check.add_argument("filter")
+    check.add_argument("passwords", nargs="+")
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        start = time.perf_counter()
+        bit_count, hash_count, entries = build_filter(
+            args.wordlist, args.output, args.fp_rate, args.format, args.entries
+        )
+        print(f"Built {args.output}: {entries:,} entries, {bit_count / 8 / 1024 / 1024:.1f} MiB, "
+              f"{hash_count} hashes, in {time.perf_counter() - start:.1f}s")
+    else:
+        breach_filter = BreachFilter(args.filter)
+        for password in args.passwords:
+            print(f"{password}: {'BREACHED' if password in breach_filter else 'not found'}")
+        breach_filter.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
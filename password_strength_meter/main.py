@@ -1,5 +1,7 @@
+import os
 import streamlit as st
-import zxcvbn
+from breach_filter import BreachFilter
+from scoring import PasswordScorer, compile_dictionary, get_strength_color
 
 # Set a background image using online image (you can replace with your own)
 st.markdown(
@@ -30,33 +32,38 @@ st.markdown(
     unsafe_allow_html=True
 )
 
+# Shared scorer: results are cached across sessions, keyed on a salted hash
+# Organisation word lists (ORG_DICTIONARY_PATHS, os.pathsep-separated) are compiled once
+@st.cache_resource
+def get_password_scorer():
+    dictionary_paths = [p for p in os.getenv("ORG_DICTIONARY_PATHS", "").split(os.pathsep) if p]
+    dictionaries = {"organisation": compile_dictionary(dictionary_paths)} if dictionary_paths else None
+    return PasswordScorer(dictionaries=dictionaries)
+
+# Breached-password filter, memory-mapped once per process (optional)
+@st.cache_resource
+def get_breach_filter():
+    filter_path = os.getenv("BREACH_FILTER_PATH", "breached.bloom")
+    if not os.path.exists(filter_path):
+        return None
+    return BreachFilter(filter_path)
+
 # Function to evaluate password strength
-def evaluate_password_strength(password):
-    result = zxcvbn.zxcvbn(password)
-    score = result['score']  # score ranges from 0 (weak) to 4 (strong)
-    feedback = result['feedback']['suggestions']
+def evaluate_password_strength(password, user_inputs=None):
+    # Per-session state lets the scorer reuse matches when characters are only appended
+    if 'score_state' not in st.session_state:
+        st.session_state.score_state = {}
+    score, feedback = get_password_scorer().score(password, st.session_state.score_state, user_inputs)  # score ranges from 0 (weak) to 4 (strong)
     return score, feedback
 
-# Function to display password strength
-def get_strength_color(score):
-    if score == 0:
-        return "red", "Weak 💔"
-    elif score == 1:
-        return "orange", "Weak 💔"
-    elif score == 2:
-        return "yellow", "Medium 💪"
-    elif score == 3:
-        return "lightgreen", "Strong 💪"
-    else:
-        return "green", "Very Strong 💥"
-
 # Streamlit UI
 st.markdown("<h1 style='text-align: center;'>🔐 Password Strength Meter</h1>", unsafe_allow_html=True)
 
 password = st.text_input("Enter your password:", type="password")
+personal_details = st.text_input("Your name, username or email (optional):", help="Passwords built from these are scored as weaker.")
 
 if password:
-    score, feedback = evaluate_password_strength(password)
+    score, feedback = evaluate_password_strength(password, personal_details.replace("@", " ").split())
     strength_color, strength_label = get_strength_color(score)
     
     bar_width = (score + 1) * 20
@@ -67,6 +74,10 @@ if password:
         unsafe_allow_html=True
     )
     st.markdown(f"<h4 style='color:{strength_color}'>Strength: {strength_label}</h4>", unsafe_allow_html=True)
+
+    breach_filter = get_breach_filter()
+    if breach_filter is not None and password in breach_filter:
+        st.error("⚠️ This password appears in a list of known breached passwords. Please choose another one.")
     
     if feedback:
         st.markdown("### Suggestions to improve your password:")
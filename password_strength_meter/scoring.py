@@ -0,0 +1,184 @@
+# Cached, incremental zxcvbn scoring
+#
+# zxcvbn's matching is superlinear in password length and it is re-run on
+# every Streamlit rerun, so this layer:
+#   - memoizes (score, suggestions) keyed on an HMAC of the password with a
+#     per-process random salt, so plaintext never becomes a cache key,
+#   - analyses at most MAX_ANALYSIS_LENGTH characters (zxcvbn >= 4.5 rejects
+#     longer inputs outright; extra characters can only add guesses),
+#   - when the new input only appends to the previous one, keeps the old
+#     dictionary matches that cannot reach the new characters and re-matches
+#     dictionaries on the tail only. Repeat, sequence, spatial, regex and date
+#     matches can span any boundary, and l33t matching depends on which
+#     substitutions occur anywhere in the input, so those matchers always see
+#     the whole string; the result is identical to a full match.
+#
+# Organisation-specific word lists are compiled once into zxcvbn-style ranked
+# dicts and passed straight to its matcher, so per-call cost depends on the
+# password length only, not on how many words the dictionaries hold.
+
+import hashlib
+import hmac
+import os
+import threading
+from collections import OrderedDict
+
+from zxcvbn import feedback, matching, scoring, time_estimates
+
+MAX_ANALYSIS_LENGTH = 72
+
+# Matchers whose matches depend only on the characters they cover
+DICTIONARY_MATCHERS = (matching.dictionary_match, matching.reverse_dictionary_match)
+FULL_STRING_MATCHERS = (
+    matching.l33t_match,
+    matching.spatial_match,
+    matching.repeat_match,
+    matching.sequence_match,
+    matching.regex_match,
+    matching.date_match,
+)
+
+
+BUILTIN_DICTIONARIES = {
+    name: ranked
+    for name, ranked in matching.RANKED_DICTIONARIES.items()
+    if name != "user_inputs"
+}
+
+
+def compile_dictionary(paths):
+    # One word per line, most common first; earlier lines and files get better ranks
+    ranked = {}
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="ignore") as file:
+            for line in file:
+                word = line.strip().lower()
+                if word and word not in ranked:
+                    ranked[word] = len(ranked) + 1
+    return ranked
+
+
+def find_matches(password, offset=0, ranked_dictionaries=BUILTIN_DICTIONARIES, matchers=None):
+    # All of zxcvbn's matchers by default, or just the given ones
+    if matchers is None:
+        matches = matching.omnimatch(password, ranked_dictionaries)
+    else:
+        matches = [m for matcher in matchers for m in matcher(password, _ranked_dictionaries=ranked_dictionaries)]
+    if offset:
+        for match in matches:
+            match["i"] += offset
+            match["j"] += offset
+    return matches
+
+
+def longest_word(ranked_dictionaries):
+    return max((len(word) for ranked in ranked_dictionaries.values() for word in ranked), default=0)
+
+
+BUILTIN_LONGEST_WORD = longest_word(BUILTIN_DICTIONARIES)
+
+
+def analyse(password, matches):
+    result = scoring.most_guessable_match_sequence(password, matches)
+    score = time_estimates.estimate_attack_times(result["guesses"])["score"]
+    suggestions = feedback.get_feedback(score, result["sequence"])["suggestions"]
+    return score, suggestions
+
+
+class PasswordScorer:
+    def __init__(self, max_entries=4096, dictionaries=None):
+        # dictionaries: {name: ranked dict} from compile_dictionary, added to zxcvbn's own
+        self.max_entries = max_entries
+        self.ranked_dictionaries = dict(BUILTIN_DICTIONARIES, **(dictionaries or {}))
+        self._longest_word = max(BUILTIN_LONGEST_WORD, longest_word(dictionaries or {}))
+        self._salt = os.urandom(16)
+        self._results = OrderedDict()  # hmac digest -> (score, suggestions)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.incremental = 0
+
+    def score(self, password, state=None, user_inputs=None):
+        # `state` is a per-session dict used to carry matches between keystrokes;
+        # `user_inputs` are the user's own details (name, email...) to penalize
+        analysed = password[:MAX_ANALYSIS_LENGTH]
+        user_words = sorted({str(word).lower() for word in user_inputs or () if word})
+        key = self._digest(analysed, user_words)
+        with self._lock:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._results.move_to_end(key)
+                self.hits += 1
+                return cached
+
+        dictionaries = self.ranked_dictionaries
+        if user_words:
+            dictionaries = dict(dictionaries, user_inputs=matching.build_ranked_dict(user_words))
+        inputs_key = self._digest("", user_words)
+        if state is not None and state.get("inputs") != inputs_key:
+            # Different user details invalidate the carried-over matches
+            state.clear()
+
+        matches = self._matches(analysed, state, dictionaries, user_words)
+        result = analyse(analysed, matches)
+        if state is not None:
+            state.update(length=len(analysed), digest=key, matches=matches, inputs=inputs_key)
+
+        with self._lock:
+            self.misses += 1
+            self._results[key] = result
+            while len(self._results) > self.max_entries:
+                self._results.popitem(last=False)
+        return result
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "incremental": self.incremental,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _matches(self, password, state, dictionaries, user_words):
+        previous_length = state.get("length", 0) if state else 0
+        if (
+            previous_length
+            and previous_length < len(password)
+            and hmac.compare_digest(self._digest(password[:previous_length], user_words), state["digest"])
+        ):
+            # A dictionary match touching the new characters starts at most one
+            # word length before them; everything starting earlier is unchanged
+            longest = max([self._longest_word, *(len(word) for word in user_words)])
+            window_start = max(0, previous_length - longest + 1)
+            kept = [
+                m for m in state["matches"]
+                if m["pattern"] == "dictionary" and not m.get("l33t") and m["i"] < window_start
+            ]
+            self.incremental += 1
+            return (
+                kept
+                + find_matches(password[window_start:], window_start, dictionaries, DICTIONARY_MATCHERS)
+                + find_matches(password, 0, dictionaries, FULL_STRING_MATCHERS)
+            )
+        return find_matches(password, 0, dictionaries)
+
+    def _digest(self, password, user_words=()):
+        message = "\0".join([password, *user_words])
+        return hmac.new(self._salt, message.encode(), hashlib.sha256).digest()
+
+
+# Function to display password strength
+def get_strength_color(score):
+    if score == 0:
+        return "red", "Weak 💔"
+    elif score == 1:
+        return "orange", "Weak 💔"
+    elif score == 2:
+        return "yellow", "Medium 💪"
+    elif score == 3:
+        return "lightgreen", "Strong 💪"
+    else:
+        return "green", "Very Strong 💥"
@@ -0,0 +1,45 @@
+# Incremental scoring must agree with scoring the whole password from scratch
+# Run with: python -m pytest test_scoring.py
+
+import random
+import string
+
+import pytest
+
+from scoring import MAX_ANALYSIS_LENGTH, PasswordScorer, analyse, find_matches
+
+TYPED_PASSWORDS = [
+    "a" * 34,
+    string.ascii_lowercase + string.ascii_uppercase,
+    "password" * 5,
+    "1234567890" * 4,
+    "qwertyuiopasdfghjkl" * 2,
+    "p4ssw0rdTr0ub4dor&3correcthorsebatterystaple",
+]
+
+
+def type_out(password, user_inputs=None):
+    # One keystroke at a time, the way the Streamlit page sees it
+    scorer, state = PasswordScorer(), {}
+    for end in range(1, len(password) + 1):
+        result = scorer.score(password[:end], state, user_inputs)
+    return scorer, result
+
+
+@pytest.mark.parametrize("password", TYPED_PASSWORDS)
+def test_incremental_matches_full_score(password):
+    scorer, typed = type_out(password)
+    analysed = password[:MAX_ANALYSIS_LENGTH]
+    assert scorer.stats()["incremental"] > 0
+    assert typed == analyse(analysed, find_matches(analysed))
+    assert typed == PasswordScorer().score(password)
+
+
+def test_incremental_matches_full_score_random():
+    rng = random.Random(0)
+    alphabet = string.ascii_letters + string.digits + "!@#$%1|3@0"
+    for _ in range(20):
+        password = "".join(rng.choice(alphabet) for _ in range(rng.randint(10, 60)))
+        password = password[:20] + rng.choice(["monkey", "dragon", "qwerty", "abcdef"]) + password[20:]
+        _, typed = type_out(password, user_inputs=["Alexandra"])
+        assert typed == PasswordScorer().score(password, user_inputs=["Alexandra"])
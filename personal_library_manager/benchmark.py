@@ -0,0 +1,265 @@
+# Library storage and query benchmarks
+# Run with: python benchmark.py
+import json
+import os
+import random
+import tempfile
+import time
+
+from bulk_io import export_books, import_books
+from duplicates import DuplicateDetector
+from library_cache import LibraryState
+from library_stats import LibraryStats
+from query_engine import BookQueryEngine
+from search_index import SearchIndex
+from storage import JournalStorage, JsonStorage, SqliteStorage, new_book_id
+
+GENRES = ["Fiction", "Science", "History", "Fantasy", "Biography", "Poetry", "Mystery", "Travel"]
+SYLLABLES = ["ka", "lo", "mi", "ra", "sen", "tor", "vel", "an", "dus", "pre", "qua", "zim"]
+
+
+def make_words(count, seed=0):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+TITLE_WORDS = make_words(20_000)
+NAMES = make_words(5_000, seed=1)
+
+
+def make_books(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {
+            "title": " ".join(rng.choice(TITLE_WORDS) for _ in range(rng.randint(1, 4))).title(),
+            "author": f"{rng.choice(NAMES)} {rng.choice(NAMES)}".title(),
+            "year": rng.randint(1800, 2025),
+            "genre": rng.choice(GENRES),
+            "read": rng.random() < 0.4,
+            "added_date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "id": new_book_id(),
+        }
+        for i in range(count)
+    ]
+
+
+def _add_latency(storage, adds):
+    new_books = make_books(adds, seed=1)
+    start = time.perf_counter()
+    for book in new_books:
+        storage.add(book)
+    return (time.perf_counter() - start) / adds * 1000
+
+
+def bench_add_latency(sizes=(10_000, 100_000, 1_000_000), adds=200):
+    for size in sizes:
+        books = make_books(size)
+        with tempfile.TemporaryDirectory() as tmp:
+            library_path = os.path.join(tmp, "library.json")
+            with open(library_path, "w") as file:
+                json.dump(books, file)
+
+            journal = JournalStorage(library_path, compact_after=10 ** 9)
+            journal.load()
+            journal_ms = _add_latency(journal, adds)
+            journal.close()
+
+            if size <= 100_000:
+                whole_file = JsonStorage(library_path)
+                whole_file.load()
+                json_ms = f"{_add_latency(whole_file, min(adds, 20)):.3f} ms"
+            else:
+                json_ms = "skipped"
+        print(f"Add latency at {size:>9,} books: journal {journal_ms:.3f} ms, whole-file JSON {json_ms}")
+
+
+def _query_latency(fn, queries):
+    start = time.perf_counter()
+    for query in queries:
+        fn(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def bench_search(size=1_000_000, queries=50):
+    books = make_books(size)
+    rng = random.Random(2)
+    terms = [rng.choice(TITLE_WORDS) for _ in range(queries)]
+
+    start = time.perf_counter()
+    index = SearchIndex(books)
+    print(f"Search index: built over {size:,} books in {time.perf_counter() - start:.1f}s")
+
+    scan = _query_latency(lambda t: [b for b in books if t in b["title"].lower()], terms[:10])
+    exact = _query_latency(lambda t: index.search(t, fields=("title",)), terms)
+    prefix = _query_latency(lambda t: index.search(t[:4], fields=("title",), limit=50), terms)
+    typo = _query_latency(lambda t: index.search(t[:-1] + "x", fields=("title",), limit=50), terms)
+    print(f"Title search at {size:,} books: linear scan {scan:.1f} ms, index exact {exact:.3f} ms, "
+          f"prefix {prefix:.3f} ms, fuzzy {typo:.3f} ms")
+
+
+def bench_filters(size=1_000_000, repeats=20):
+    books = make_books(size)
+    start = time.perf_counter()
+    engine = BookQueryEngine(books)
+    print(f"Query engine: built over {size:,} books in {time.perf_counter() - start:.1f}s")
+
+    cases = {
+        "year 1990-1999": dict(year_min=1990, year_max=1999),
+        "unread Fantasy": dict(read=False, genres=["Fantasy"]),
+        "read Science/History 1900-1950": dict(year_min=1900, year_max=1950, read=True, genres=["Science", "History"]),
+    }
+    for name, filters in cases.items():
+        start = time.perf_counter()
+        for _ in range(repeats):
+            books_page, facets = engine.query(limit=50, **filters)
+        elapsed = (time.perf_counter() - start) / repeats * 1000
+        scan_start = time.perf_counter()
+        scan = [
+            b for b in books
+            if filters.get("year_min", 0) <= b["year"] <= filters.get("year_max", 9999)
+            and (filters.get("read") is None or b["read"] == filters["read"])
+            and (not filters.get("genres") or b["genre"] in filters["genres"])
+        ]
+        scan_ms = (time.perf_counter() - scan_start) * 1000
+        assert facets["total"] == len(scan)
+        print(f"Filter {name!r}: {elapsed:.3f} ms with facets ({facets['total']:,} matches), "
+              f"linear scan {scan_ms:.1f} ms")
+
+
+def bench_stats(size=1_000_000, updates=10_000):
+    books = make_books(size)
+    stats = LibraryStats(books)
+
+    start = time.perf_counter()
+    total = len(books)
+    read = sum(1 for b in books if b["read"])
+    genres = {b["genre"] for b in books}
+    oldest = min(b["year"] for b in books)
+    newest = max(b["year"] for b in books)
+    rescan = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    summary = (stats.total, stats.read, len(stats.genres), stats.oldest, stats.newest)
+    incremental = (time.perf_counter() - start) * 1e6
+    assert summary == (total, read, len(genres), oldest, newest)
+
+    start = time.perf_counter()
+    for book in books[:updates]:
+        stats.remove(book)
+        stats.add(book)
+    per_update = (time.perf_counter() - start) / (updates * 2) * 1e6
+    print(f"Stats at {size:,} books: full rescan {rescan:.1f} ms, incremental read {incremental:.1f} µs, "
+          f"{per_update:.2f} µs per add/remove")
+
+
+def bench_pagination(size=1_000_000, page_size=50):
+    # display_books renders one page; fetching it must not depend on library size
+    books = make_books(size)
+    results, _ = BookQueryEngine(books).query(read=False)
+    for cursor in (0, size // 4, size // 2 - page_size):
+        start = time.perf_counter()
+        page = books[cursor:cursor + page_size]
+        list_us = (time.perf_counter() - start) * 1e6
+        start = time.perf_counter()
+        filtered_page = results[cursor:cursor + page_size]
+        filtered_ms = (time.perf_counter() - start) * 1000
+        assert len(page) == page_size and len(filtered_page) == page_size
+        print(f"Page at cursor {cursor:,}: library slice {list_us:.1f} µs, "
+              f"filtered slice {filtered_ms:.2f} ms ({len(results):,} matches)")
+
+
+def bench_bulk_import(sizes=(100_000, 1_000_000), fmt="csv"):
+    # Throughput should stay flat as the import grows if nothing is quadratic
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, f"books.{fmt}")
+            export_books(make_books(size), source, fmt)
+            storage = SqliteStorage(os.path.join(tmp, "library.db"))
+
+            start = time.perf_counter()
+            report = import_books(storage, source, fmt)
+            import_s = time.perf_counter() - start
+            assert report.imported == size == storage.count()
+
+            start = time.perf_counter()
+            export_books(storage.iter_books(), os.path.join(tmp, f"export.{fmt}"), fmt)
+            export_s = time.perf_counter() - start
+            storage.close()
+        print(f"Bulk {fmt} at {size:,} rows: import {size / import_s:,.0f} rows/s ({import_s:.1f}s), "
+              f"export {size / export_s:,.0f} rows/s")
+
+
+def bench_keyed_removal(size=1_000_000, removals=200):
+    books = make_books(size)
+    engine = BookQueryEngine(books)
+    index = SearchIndex(books[:100_000])
+    victims = random.Random(3).sample(books[:100_000], removals)
+
+    start = time.perf_counter()
+    remaining = books
+    for book in victims[:5]:
+        remaining = [b for b in remaining if b["id"] != book["id"]]
+    scan_ms = (time.perf_counter() - start) / 5 * 1000
+
+    start = time.perf_counter()
+    for book in victims:
+        engine.remove_book(book["id"])
+        index.remove_book(book["id"])
+    keyed_ms = (time.perf_counter() - start) / removals * 1000
+    print(f"Remove one book at {size:,}: list rebuild {scan_ms:.1f} ms, keyed {keyed_ms:.3f} ms")
+
+
+def bench_duplicates(size=100_000, lookups=500):
+    books = make_books(size)
+    # One-character typo in the title, as a new (id-less) book
+    probes = [
+        {"title": book["title"][:-1], "author": book["author"]}
+        for book in random.Random(4).sample(books, lookups)
+    ]
+    for fuzzy in (False, True):
+        start = time.perf_counter()
+        detector = DuplicateDetector(books, fuzzy=fuzzy)
+        build_s = time.perf_counter() - start
+        start = time.perf_counter()
+        found = sum(1 for probe in probes if detector.find(probe))
+        per_lookup = (time.perf_counter() - start) / lookups * 1000
+        print(f"Duplicates ({'minhash/lsh' if fuzzy else 'exact key'}) at {size:,}: built in {build_s:.1f}s, "
+              f"{per_lookup:.3f} ms per lookup, {found}/{lookups} one-typo titles flagged")
+
+
+def bench_rerun(size=100_000, reruns=1000):
+    # Before: every Streamlit rerun rebuilt LibraryManager from disk
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = SqliteStorage(os.path.join(tmp, "library.db"))
+        storage.add_many(make_books(size))
+        start = time.perf_counter()
+        library = LibraryState(storage, check_interval=0)
+        cold = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(reruns):
+            library.refresh_if_changed()
+            with library.read():
+                page = library.query_engine.all_books()[:25]
+        warm = (time.perf_counter() - start) / reruns * 1e6
+        assert library.loads == 1 and len(page) == 25
+        storage.close()
+    print(f"Rerun at {size:,} books: cold load {cold:.1f}s, cached rerun {warm:.0f} µs "
+          f"(change check + first page, no reload)")
+
+
+if __name__ == "__main__":
+    bench_add_latency()
+    bench_search()
+    bench_filters()
+    bench_stats()
+    bench_pagination()
+    bench_bulk_import()
+    bench_bulk_import(sizes=(1_000_000,), fmt="jsonl")
+    bench_bulk_import(sizes=(1_000_000,), fmt="parquet")
+    bench_keyed_removal()
+    bench_duplicates()
+    bench_rerun()
@@ -0,0 +1,230 @@
+# Streaming bulk import/export for the library
+#
+# Rows are read one at a time from CSV, JSON Lines or Parquet, validated in
+# batches and handed to storage.add_many one batch at a time, so memory stays
+# bounded by the batch size and each batch is a single commit (one SQLite
+# transaction, one journal flush); SQLite also rebuilds its indexes once at the
+# end instead of per row. Export streams books back out the same way.
+#
+#   python bulk_io.py import books.csv [--format csv] [--batch-size 10000]
+#   python bulk_io.py export books.jsonl
+
+import argparse
+import csv
+import io
+import json
+from collections import namedtuple
+from datetime import datetime
+from itertools import islice
+from os import path
+
+from storage import BOOK_FIELDS, get_storage
+
+FORMATS = ("csv", "jsonl", "parquet")
+BATCH_SIZE = 10_000
+MAX_REPORTED_ERRORS = 100
+TRUE_VALUES = {"1", "true", "yes", "y", "✓"}
+FALSE_VALUES = {"0", "false", "no", "n", "✗", ""}
+
+ImportReport = namedtuple("ImportReport", "imported rejected errors")
+# Stands in for a line that could not be parsed, so it is rejected like any invalid row
+UnreadableRow = namedtuple("UnreadableRow", "message")
+
+
+def detect_format(file_name):
+    extension = path.splitext(file_name)[1].lower().lstrip(".")
+    if extension in ("jsonl", "ndjson"):
+        return "jsonl"
+    if extension in FORMATS:
+        return extension
+    raise ValueError(f"Unsupported file type: {file_name}")
+
+
+def parse_read(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"read must be yes/no, got {value!r}")
+
+
+def validate_book(row, today):
+    if isinstance(row, UnreadableRow):
+        raise ValueError(row.message)
+    if not isinstance(row, dict):
+        raise ValueError(f"expected an object with book fields, got {type(row).__name__}")
+    book = {}
+    for field in ("title", "author", "genre"):
+        value = str(row.get(field) or "").strip()
+        if not value:
+            raise ValueError(f"missing {field}")
+        book[field] = value
+    try:
+        book["year"] = int(row.get("year"))
+    except (TypeError, ValueError):
+        raise ValueError(f"year must be a whole number, got {row.get('year')!r}")
+    book["read"] = parse_read(row.get("read", False))
+    book["added_date"] = str(row.get("added_date") or today)
+    # Any "id" column is ignored: storage hands out fresh ids, so re-importing
+    # an export into the same library cannot collide
+    return book
+
+
+def validate_batch(rows, first_line, today):
+    # Returns (valid books, [(line number, message), ...])
+    books, errors = [], []
+    for line, row in enumerate(rows, first_line):
+        try:
+            books.append(validate_book(row, today))
+        except ValueError as e:
+            errors.append((line, str(e)))
+    return books, errors
+
+
+# ----- Readers -----
+def iter_csv_rows(file):
+    yield from csv.DictReader(file)
+
+
+def iter_jsonl_rows(file):
+    for line in file:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield UnreadableRow(f"invalid JSON: {e}")
+
+
+def iter_parquet_rows(source, batch_size=BATCH_SIZE):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet import needs pyarrow: pip install pyarrow")
+    for batch in pq.ParquetFile(source).iter_batches(batch_size=batch_size):
+        yield from batch.to_pylist()
+
+
+def iter_rows(source, fmt, batch_size=BATCH_SIZE):
+    # `source` is a path, or a binary file object such as a Streamlit upload
+    if fmt == "parquet":
+        yield from iter_parquet_rows(source, batch_size)
+        return
+    # utf-8-sig drops the byte-order mark Excel puts in front of the first header
+    if isinstance(source, str):
+        file = open(source, "r", encoding="utf-8-sig", newline="")
+    else:
+        file = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+    with file:
+        yield from (iter_csv_rows(file) if fmt == "csv" else iter_jsonl_rows(file))
+
+
+def import_books(storage, source, fmt, batch_size=BATCH_SIZE, on_batch=None):
+    rows = iter_rows(source, fmt, batch_size)
+    today = datetime.now().strftime("%Y-%m-%d")
+    imported = rejected = 0
+    errors = []
+    # Line numbers are 1-based data rows; CSV files have the header on line 1
+    line = 2 if fmt == "csv" else 1
+    with storage.bulk_load():
+        while True:
+            chunk = list(islice(rows, batch_size))
+            if not chunk:
+                break
+            books, batch_errors = validate_batch(chunk, line, today)
+            line += len(chunk)
+            if books:
+                storage.add_many(books)
+            imported += len(books)
+            rejected += len(batch_errors)
+            errors.extend(batch_errors[:MAX_REPORTED_ERRORS - len(errors)])
+            if on_batch:
+                on_batch(imported, rejected)
+    return ImportReport(imported, rejected, errors)
+
+
+# ----- Writers -----
+def export_books(books, destination, fmt, batch_size=BATCH_SIZE):
+    # `books` may be any iterable (e.g. storage.iter_books()); returns the row count
+    if fmt == "parquet":
+        return _export_parquet(books, destination, batch_size)
+    if isinstance(destination, str):
+        file = open(destination, "w", encoding="utf-8", newline="")
+    else:
+        file = io.TextIOWrapper(destination, encoding="utf-8", newline="", write_through=True)
+    count = 0
+    try:
+        if fmt == "csv":
+            writer = csv.DictWriter(file, fieldnames=BOOK_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for batch in _batched(books, batch_size):
+                writer.writerows(batch)
+                count += len(batch)
+        else:
+            for batch in _batched(books, batch_size):
+                file.write("".join(json.dumps(book) + "\n" for book in batch))
+                count += len(batch)
+    finally:
+        if isinstance(destination, str):
+            file.close()
+        else:
+            file.detach()  # leave the caller's binary buffer open
+    return count
+
+
+def _export_parquet(books, destination, batch_size):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow: pip install pyarrow")
+    schema = pa.schema([
+        ("id", pa.string()),
+        ("title", pa.string()),
+        ("author", pa.string()),
+        ("year", pa.int64()),
+        ("genre", pa.string()),
+        ("read", pa.bool_()),
+        ("added_date", pa.string()),
+    ])
+    count = 0
+    with pq.ParquetWriter(destination, schema) as writer:
+        for batch in _batched(books, batch_size):
+            rows = [{field: book.get(field) for field in BOOK_FIELDS} for book in batch]
+            writer.write_batch(pa.RecordBatch.from_pylist(rows, schema=schema))
+            count += len(batch)
+    return count
+
+
+def _batched(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bulk import/export for the personal library")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("file", help="CSV, JSON Lines or Parquet file")
+    parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.file)
+    storage = get_storage()
+    try:
+        if args.command == "import":
+            report = import_books(storage, args.file, fmt, args.batch_size)
+            for line, message in report.errors:
+                print(f"line {line}: {message}")
+            print(f"Imported {report.imported} books, rejected {report.rejected}")
+        else:
+            count = export_books(storage.iter_books(args.batch_size), args.file, fmt, args.batch_size)
+            print(f"Exported {count} books to {args.file}")
+    finally:
+        storage.close()
@@ -0,0 +1,132 @@
+# Near-duplicate detection for books
+#
+# Every book gets a normalized (title, author) key: lowercase, accents and
+# punctuation stripped, leading articles dropped. Books sharing a key are
+# exact duplicates. With fuzzy matching on, the key's character trigrams are
+# MinHashed and the signature is split into LSH bands; books landing in the
+# same bucket in any band are candidates, scored by signature agreement, so a
+# lookup touches a handful of buckets instead of the whole library.
+
+import re
+import unicodedata
+import zlib
+
+LEADING_ARTICLES = {"the", "a", "an"}
+NON_WORD = re.compile(r"[^\w\s]")
+MERSENNE_PRIME = (1 << 31) - 1
+
+
+def normalize(text):
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode()
+    words = NON_WORD.sub(" ", text.lower()).split()
+    if len(words) > 1 and words[0] in LEADING_ARTICLES:
+        words = words[1:]
+    return " ".join(words)
+
+
+def book_key(book):
+    return normalize(book["title"]), normalize(book["author"])
+
+
+def shingles(text, size=3):
+    padded = f" {text} "
+    return {padded[i:i + size] for i in range(max(len(padded) - size + 1, 1))}
+
+
+class MinHasher:
+    def __init__(self, num_perm=64, seed=1):
+        # Only fuzzy matching needs numpy, so the app still starts without it
+        try:
+            import numpy as np
+        except ImportError:
+            raise ImportError("Fuzzy duplicate matching needs numpy: pip install numpy")
+        self.np = np
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        np = self.np
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles(text)), dtype=np.uint64)
+        hashes %= MERSENNE_PRIME
+        # (a * h + b) mod p, one row per permutation; everything stays below 2^62
+        values = (self.a[:, None] * hashes[None, :] + self.b[:, None]) % MERSENNE_PRIME
+        return values.min(axis=1)
+
+
+class DuplicateDetector:
+    def __init__(self, books=(), fuzzy=False, threshold=0.6, num_perm=64, bands=16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.fuzzy = fuzzy
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.hasher = MinHasher(num_perm) if fuzzy else None
+        self.books = {}  # book id -> book
+        self.keys = {}  # normalized key -> set of book ids
+        self.signatures = {}  # book id -> MinHash signature (fuzzy only)
+        self.buckets = {}  # (band, band hash) -> set of book ids
+        for book in books:
+            self.add(book)
+
+    def add(self, book):
+        self.books[book["id"]] = book
+        key = book_key(book)
+        self.keys.setdefault(key, set()).add(book["id"])
+        if self.fuzzy:
+            signature = self.signatures[book["id"]] = self._signature(key)
+            for bucket in self._buckets(signature):
+                self.buckets.setdefault(bucket, set()).add(book["id"])
+
+    def remove(self, book_id):
+        book = self.books.pop(book_id, None)
+        if book is None:
+            return
+        key = book_key(book)
+        self._discard(self.keys, key, book_id)
+        if self.fuzzy:
+            for bucket in self._buckets(self.signatures.pop(book_id)):
+                self._discard(self.buckets, bucket, book_id)
+
+    def update(self, book_id, book):
+        self.remove(book_id)
+        self.add(book)
+
+    def find(self, book, limit=5):
+        # Returns [(existing book, similarity)], best first; exact key matches score 1.0
+        key = book_key(book)
+        matches = {book_id: 1.0 for book_id in self.keys.get(key, ())}
+        if self.fuzzy:
+            signature = self._signature(key)
+            candidates = set()
+            for bucket in self._buckets(signature):
+                candidates.update(self.buckets.get(bucket, ()))
+            candidates = list(candidates - matches.keys())
+            if candidates:
+                # Score every candidate in one vectorized comparison
+                others = self.hasher.np.stack([self.signatures[book_id] for book_id in candidates])
+                similarities = (others == signature).mean(axis=1)
+                for book_id, similarity in zip(candidates, similarities.tolist()):
+                    if similarity >= self.threshold:
+                        matches[book_id] = similarity
+        matches.pop(book.get("id"), None)
+        ranked = sorted(matches.items(), key=lambda item: -item[1])[:limit]
+        return [(self.books[book_id], similarity) for book_id, similarity in ranked]
+
+    def _signature(self, key):
+        # Values are < 2^31, so uint32 halves the memory held per book
+        return self.hasher.signature(" ".join(key)).astype(self.hasher.np.uint32)
+
+    def _buckets(self, signature):
+        for band in range(self.bands):
+            rows = signature[band * self.rows:(band + 1) * self.rows]
+            yield band, hash(rows.tobytes())
+
+    @staticmethod
+    def _discard(index, key, book_id):
+        ids = index.get(key)
+        if ids is not None:
+            ids.discard(book_id)
+            if not ids:
+                del index[key]
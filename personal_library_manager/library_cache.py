@@ -0,0 +1,182 @@
+# Process-wide library state shared by every Streamlit session
+#
+# Streamlit re-runs main.py on every interaction, so the storage and the
+# in-memory structures built from it (search index, query engine, stats,
+# duplicate detector) live in one LibraryState held by st.cache_resource.
+#
+# Concurrency:
+#   - Readers take the shared side of an RWLock only long enough to copy out
+#     what they render (a page of books, facet counts), never across widgets.
+#   - Writers are serialized by a separate mutex that readers never touch.
+#     A single-book change holds the exclusive side of the RWLock just for the
+#     in-memory index updates (microseconds).
+#   - Reloads and bulk imports build a complete new snapshot off to the side
+#     and swap it in under the exclusive lock, so readers keep using the old
+#     snapshot while the rebuild runs (copy-on-write at the snapshot level).
+#
+# A rerun with no changes only checks storage.has_external_changes() (a stat or
+# a PRAGMA), at most once per check_interval, and never re-reads the library.
+
+import threading
+import time
+from contextlib import contextmanager
+
+from bulk_io import import_books
+from duplicates import DuplicateDetector
+from library_stats import LibraryStats
+from query_engine import BookQueryEngine
+from search_index import SearchIndex
+from storage import ensure_id
+
+
+class RWLock:
+    # Many readers or one writer; waiting writers block new readers so a
+    # steady stream of reruns cannot starve an update
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writer = False
+        self._waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writer or self._waiting_writers:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._waiting_writers += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._waiting_writers -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class LibraryState:
+    def __init__(self, storage, check_interval=1.0, fuzzy_duplicates=False):
+        self.storage = storage
+        self.check_interval = check_interval
+        self.fuzzy_duplicates = fuzzy_duplicates
+        self.lock = RWLock()
+        self.version = 0
+        self.loads = 0
+        self._write_mutex = threading.RLock()
+        self._last_check = 0.0
+        self._duplicates = None
+        self.reload()
+
+    def read(self):
+        return self.lock.read()
+
+    def reload(self):
+        with self._write_mutex:
+            books = self.storage.load()
+            index, engine, stats = SearchIndex(books), BookQueryEngine(books), LibraryStats(books)
+            stats.prune()
+            with self.lock.write():
+                self.index, self.query_engine, self.stats = index, engine, stats
+                self._duplicates = None
+                self.version += 1
+            self.loads += 1
+            self._last_check = time.monotonic()
+
+    def refresh_if_changed(self):
+        # Returns True when the library was reloaded because storage changed underneath us
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        if not self._write_mutex.acquire(blocking=False):
+            return False  # a writer is busy; its own changes are already applied
+        try:
+            self._last_check = now
+            if not self.storage.has_external_changes():
+                return False
+            self.reload()
+            return True
+        finally:
+            self._write_mutex.release()
+
+    def snapshot(self):
+        # A plain list of every book, safe to use after the lock is released
+        with self.lock.read():
+            return list(self.query_engine.all_books())
+
+    # ----- Writes -----
+    def add(self, book):
+        with self._write_mutex:
+            self.storage.add(ensure_id(book))
+            with self.lock.write():
+                self.index.add(book)
+                self.query_engine.add(book)
+                self.stats.add(book)
+                self.stats.prune()
+                if self._duplicates is not None:
+                    self._duplicates.add(book)
+                self.version += 1
+
+    def remove(self, book_id):
+        with self._write_mutex:
+            book = self.query_engine.get(book_id)
+            if book is None:
+                return False
+            self.storage.remove(book_id)
+            with self.lock.write():
+                self.index.remove_book(book_id)
+                self.query_engine.remove_book(book_id)
+                self.stats.remove(book)
+                self.stats.prune()
+                if self._duplicates is not None:
+                    self._duplicates.remove(book_id)
+                self.version += 1
+            return True
+
+    def update(self, book_id, changes):
+        with self._write_mutex:
+            old_book = self.query_engine.get(book_id)
+            if old_book is None:
+                return False
+            book = {**old_book, **changes}
+            self.storage.update(book_id, changes)
+            with self.lock.write():
+                self.index.update(book_id, book)
+                self.query_engine.update(book_id, book)
+                self.stats.update(old_book, book)
+                self.stats.prune()
+                if self._duplicates is not None:
+                    self._duplicates.update(book_id, book)
+                self.version += 1
+            return True
+
+    def bulk_import(self, source, fmt, on_batch=None):
+        # Readers keep the old snapshot until the rebuilt one is swapped in
+        with self._write_mutex:
+            try:
+                return import_books(self.storage, source, fmt, on_batch=on_batch)
+            finally:
+                # Batches committed before a failure are in storage too, and our
+                # own writes never show up in has_external_changes()
+                self.reload()
+
+    def find_duplicates(self, book):
+        with self._write_mutex:
+            # Built once on first use; holding the write mutex keeps it in step with storage
+            if self._duplicates is None:
+                self._duplicates = DuplicateDetector(self.snapshot(), fuzzy=self.fuzzy_duplicates)
+        with self.lock.read():
+            return self._duplicates.find(book)
@@ -0,0 +1,81 @@
+# Incrementally maintained library statistics
+#
+# show_stats used to rescan every book four times per visit. LibraryStats is
+# updated as books are added, removed or changed: counters for totals and read
+# books, multisets for genres, years and months added, and a pair of heaps
+# with lazy deletion so the oldest/newest year survive removals in O(log n).
+
+import heapq
+from collections import Counter
+
+
+class LibraryStats:
+    def __init__(self, books=()):
+        self.total = 0
+        self.read = 0
+        self.genres = Counter()
+        self.genre_read = Counter()
+        self.years = Counter()
+        self.added_per_month = Counter()
+        self._min_years = []
+        self._max_years = []
+        for book in books:
+            self.add(book)
+
+    def add(self, book):
+        self._apply(book, 1)
+
+    def remove(self, book):
+        self._apply(book, -1)
+
+    def update(self, old_book, new_book):
+        self.remove(old_book)
+        self.add(new_book)
+
+    @property
+    def oldest(self):
+        return self._peek(self._min_years, 1)
+
+    @property
+    def newest(self):
+        return self._peek(self._max_years, -1)
+
+    def prune(self):
+        # Drops stale heap tops now, so oldest/newest stay pure reads afterwards
+        self._peek(self._min_years, 1)
+        self._peek(self._max_years, -1)
+
+    def read_ratios(self):
+        return {genre: self.genre_read[genre] / count for genre, count in self.genres.items()}
+
+    def _apply(self, book, delta):
+        self.total += delta
+        genre = book["genre"]
+        self._bump(self.genres, genre, delta)
+        if book["read"]:
+            self.read += delta
+            self._bump(self.genre_read, genre, delta)
+
+        year = book["year"]
+        if self._bump(self.years, year, delta) and delta > 0:
+            # First book for this year; stale heap entries are skipped on peek
+            heapq.heappush(self._min_years, year)
+            heapq.heappush(self._max_years, -year)
+
+        month = (book.get("added_date") or "")[:7]
+        if month:
+            self._bump(self.added_per_month, month, delta)
+
+    def _peek(self, heap, sign):
+        while heap and not self.years.get(sign * heap[0]):
+            heapq.heappop(heap)
+        return sign * heap[0] if heap else None
+
+    @staticmethod
+    def _bump(counter, key, delta):
+        # Returns True when the key appeared or disappeared
+        counter[key] += delta
+        if counter[key] <= 0:
+            del counter[key]
+            return True
+        return counter[key] == delta
@@ -1,35 +1,77 @@
 # library_manager_streamlit.py
+import io
+import os
 import streamlit as st
-import json
 from datetime import datetime
-from os import path
+from bulk_io import FORMATS, detect_format, export_books
+from library_cache import LibraryState
+from storage import get_storage
+
+PAGE_SIZES = [10, 25, 50, 100]
+REMOVE_CHOICES = 50  # books offered in the remove picker
+
+@st.cache_resource
+def get_library():
+    # One library per process, shared by every session and rerun
+    return LibraryState(
+        get_storage(),
+        check_interval=float(os.getenv("LIBRARY_CACHE_CHECK_INTERVAL", "1")),
+        fuzzy_duplicates=os.getenv("LIBRARY_FUZZY_DUPLICATES", "") == "1",
+    )
 
 class LibraryManager:
     def __init__(self):
-        self.books = []
-        self.load_library()
         self.setup_page()
+        try:
+            self.library = get_library()
+            self.library.refresh_if_changed()
+        except Exception as e:
+            st.error(f"Error loading library: {str(e)}")
+            st.stop()
+        with self.library.read():
+            st.write(f"Total books loaded: {len(self.books)}")
+
+    # The shared structures; only touch them inside `with self.library.read()`
+    @property
+    def books(self):
+        # All books in storage order, as a lazy view over the query engine
+        return self.library.query_engine.all_books()
+
+    @property
+    def index(self):
+        return self.library.index
+
+    @property
+    def query_engine(self):
+        return self.library.query_engine
+
+    @property
+    def stats(self):
+        return self.library.stats
 
     def setup_page(self):
         st.set_page_config(page_title="Personal Library Manager", layout="wide")
         st.title("📚 Personal Library Manager")
         st.write(f"Current date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-        st.write(f"Total books loaded: {len(self.books)}")
 
-    def load_library(self):
+    def save_book(self, book):
         try:
-            if path.exists("library.json"):
-                with open("library.json", "r") as file:
-                    self.books = json.load(file)
+            self.library.add(book)
+            return True
         except Exception as e:
-            st.error(f"Error loading library: {str(e)}")
-            self.books = []
+            st.error(f"Error saving library: {str(e)}")
+            return False
 
-    def save_library(self):
+    def delete_book(self, book_id):
         try:
-            with open("library.json", "w") as file:
-                json.dump(self.books, file, indent=4)
-            return True
+            return self.library.remove(book_id)
+        except Exception as e:
+            st.error(f"Error saving library: {str(e)}")
+            return False
+
+    def update_book(self, book_id, changes):
+        try:
+            return self.library.update(book_id, changes)
         except Exception as e:
             st.error(f"Error saving library: {str(e)}")
             return False
@@ -42,37 +84,54 @@ class LibraryManager:
             year = st.number_input("Publication Year", min_value=1800, max_value=datetime.now().year)
             genre = st.text_input("Genre")
             read = st.checkbox("Have you read this book?")
+            allow_duplicate = st.checkbox("Add even if it looks like a duplicate")
             
             if st.form_submit_button("Add Book"):
                 if title and author and genre:
-                    self.books.append({
+                    book = {
                         "title": title,
                         "author": author,
                         "year": int(year),
                         "genre": genre,
                         "read": read,
                         "added_date": datetime.now().strftime("%Y-%m-%d")
-                    })
-                    self.save_library()
-                    st.success(f"✅ '{title}' added successfully!")
+                    }
+                    matches = self.library.find_duplicates(book)
+                    if matches and not allow_duplicate:
+                        st.warning("This looks like a book you already have:")
+                        for match, similarity in matches:
+                            st.write(f"- {match['title']} by {match['author']} ({match['year']}) · {similarity:.0%} match")
+                        st.info("Tick 'Add even if it looks like a duplicate' to add it anyway.")
+                    elif self.save_book(book):
+                        st.success(f"✅ '{title}' added successfully!")
                 else:
                     st.warning("Please fill all required fields")
 
     def remove_book(self):
         st.subheader("🗑️ Remove Book")
-        if not self.books:
-            st.warning("Your library is empty!")
+        search_term = st.text_input("Find the book to remove", key="remove_search")
+        with self.library.read():
+            if not len(self.books):
+                st.warning("Your library is empty!")
+                return
+            # Only one page of candidates is offered, never the whole library;
+            # books are picked by id, so editions and same-titled books stay separate
+            if search_term:
+                candidates = self.index.search(search_term, limit=REMOVE_CHOICES)
+            else:
+                candidates = self.books[:REMOVE_CHOICES]
+            labels = {book["id"]: f"{book['title']} by {book['author']} ({book['year']})" for book in candidates}
+        if not labels:
+            st.warning("No books found!")
             return
-            
-        title_to_remove = st.selectbox(
-            "Select book to remove",
-            [book["title"] for book in self.books]
-        )
-        
+
+        id_to_remove = st.selectbox("Select book to remove", list(labels), format_func=labels.get)
+
         if st.button("Remove Book"):
-            self.books = [book for book in self.books if book["title"] != title_to_remove]
-            self.save_library()
-            st.success(f"✅ '{title_to_remove}' removed successfully!")
+            with self.library.read():
+                book = self.query_engine.get(id_to_remove)
+            if book is not None and self.delete_book(id_to_remove):
+                st.success(f"✅ '{book['title']}' removed successfully!")
 
     def search_books(self):
         st.subheader("🔍 Search Books")
@@ -81,48 +140,141 @@ class LibraryManager:
         
         if search_term:
             results = []
-            if search_type == "Title":
-                results = [b for b in self.books if search_term.lower() in b["title"].lower()]
-            elif search_type == "Author":
-                results = [b for b in self.books if search_term.lower() in b["author"].lower()]
-            elif search_type == "Genre":
-                results = [b for b in self.books if search_term.lower() in b["genre"].lower()]
+            if search_type in ("Title", "Author", "Genre"):
+                # Ranked prefix/typo-tolerant lookup in the inverted index
+                with self.library.read():
+                    results = self.index.search(search_term, fields=(search_type.lower(),))
             elif search_type == "Year":
                 try:
                     year = int(search_term)
-                    results = [b for b in self.books if b["year"] == year]
+                    with self.library.read():
+                        results, _ = self.query_engine.query(year_min=year, year_max=year)
                 except ValueError:
                     st.error("Please enter a valid year")
             
             self.display_books(results, "Search Results")
 
+    def filter_books(self):
+        st.subheader("🎛️ Filter Books")
+        with self.library.read():
+            oldest, newest = self.query_engine.year_range()
+            all_genres = sorted(self.query_engine.genre_bits)
+        if oldest is None:
+            st.warning("Your library is empty!")
+            return
+
+        newest = max(newest, oldest + 1)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            year_min, year_max = st.slider(
+                "Publication years", min_value=oldest, max_value=newest, value=(oldest, newest)
+            )
+        with col2:
+            status = st.selectbox("Read status", ["Any", "Read", "Unread"])
+        with col3:
+            genres = st.multiselect("Genres", all_genres)
+
+        read = {"Any": None, "Read": True, "Unread": False}[status]
+        with self.library.read():
+            results, facets = self.query_engine.query(year_min, year_max, read, genres)
+
+        st.write(f"**{facets['total']} matching books** · ✓ {facets['read']} read · ✗ {facets['unread']} unread")
+        if facets["genres"]:
+            st.write("**By genre:** " + ", ".join(f"{g} ({n})" for g, n in facets["genres"].items()))
+        self.display_books(results, "Filtered Books")
+
     def display_books(self, books=None, title="Your Library"):
-        if books is None:
-            books = self.books
+        with self.library.read():
+            if books is None:
+                books = self.books
+            total = len(books)
             
         st.subheader(title)
-        if not books:
+        if not total:
             st.warning("No books found!")
             return
-            
-        for book in books:
+
+        # Only one page is ever rendered; the cursor is an offset into `books`
+        key = title.lower().replace(" ", "_")
+        cursor_key = f"{key}_cursor"
+        col1, col2 = st.columns(2)
+        page_size = col1.selectbox("Books per page", PAGE_SIZES, key=f"{key}_page_size")
+        compact = col2.checkbox("Compact table view", key=f"{key}_compact")
+
+        cursor = min(st.session_state.get(cursor_key, 0), (total - 1) // page_size * page_size)
+        prev_col, info_col, next_col = st.columns([1, 3, 1])
+        if prev_col.button("◀ Previous", key=f"{key}_prev", disabled=cursor == 0):
+            cursor = max(0, cursor - page_size)
+        if next_col.button("Next ▶", key=f"{key}_next", disabled=cursor + page_size >= total):
+            cursor = min(cursor + page_size, (total - 1) // page_size * page_size)
+        st.session_state[cursor_key] = cursor
+        info_col.write(f"Showing {cursor + 1}–{min(cursor + page_size, total)} of {total} books")
+
+        with self.library.read():
+            page = books[cursor:cursor + page_size]
+        if compact:
+            st.dataframe(
+                [{**book, "read": "✓" if book["read"] else "✗"} for book in page],
+                use_container_width=True, hide_index=True,
+                column_order=("title", "author", "year", "genre", "read", "added_date")
+            )
+            return
+
+        for book in page:
             with st.expander(f"{book['title']} by {book['author']}"):
                 st.write(f"**Year:** {book['year']}")
                 st.write(f"**Genre:** {book['genre']}")
                 st.write(f"**Read:** {'✓' if book['read'] else '✗'}")
                 st.write(f"**Added:** {book.get('added_date', 'N/A')}")
+                label = "Mark as unread" if book["read"] else "Mark as read"
+                if st.button(label, key=f"{key}_toggle_{book['id']}"):
+                    if self.update_book(book["id"], {"read": not book["read"]}):
+                        st.rerun()
+
+    def import_export(self):
+        st.subheader("📦 Import / Export")
+        uploaded = st.file_uploader("Import books from CSV, JSON Lines or Parquet", type=["csv", "jsonl", "ndjson", "parquet"])
+        st.caption("Columns: title, author, year, genre, read, added_date (optional)")
+        if uploaded and st.button("Import Books"):
+            progress = st.empty()
+            try:
+                # Rebuilds the in-memory indexes once rather than per imported book
+                report = self.library.bulk_import(
+                    uploaded, detect_format(uploaded.name),
+                    on_batch=lambda done, bad: progress.write(f"Imported {done} books so far ({bad} rejected)...")
+                )
+            except Exception as e:
+                st.error(f"Error importing books: {str(e)}")
+                return
+            st.success(f"✅ Imported {report.imported} books, rejected {report.rejected}")
+            for line, message in report.errors:
+                st.write(f"Line {line}: {message}")
+
+        st.divider()
+        fmt = st.selectbox("Export format", FORMATS)
+        if st.button("Prepare Export"):
+            buffer = io.BytesIO()
+            try:
+                count = export_books(self.library.snapshot(), buffer, fmt)
+            except Exception as e:
+                st.error(f"Error exporting books: {str(e)}")
+                return
+            st.download_button(f"Download {count} books", buffer.getvalue(), file_name=f"library.{fmt}")
 
     def show_stats(self):
         st.subheader("📊 Library Statistics")
-        if not self.books:
+        with self.library.read():
+            total = self.stats.total
+            read = self.stats.read
+            genres = self.stats.genres.copy()
+            genre_read = self.stats.genre_read.copy()
+            added_per_month = self.stats.added_per_month.copy()
+            oldest = self.stats.oldest
+            newest = self.stats.newest
+            ratios = self.stats.read_ratios()
+        if not total:
             st.warning("Your library is empty!")
             return
-            
-        total = len(self.books)
-        read = sum(1 for b in self.books if b["read"])
-        genres = {b["genre"] for b in self.books}
-        oldest = min(b["year"] for b in self.books)
-        newest = max(b["year"] for b in self.books)
         
         col1, col2, col3 = st.columns(3)
         col1.metric("Total Books", total)
@@ -132,8 +284,16 @@ class LibraryManager:
         st.write(f"**Publication years:** {oldest} to {newest}")
         st.write("**Genres:** " + ", ".join(genres))
 
+        st.write("**Read ratio by genre:**")
+        for genre, count in genres.most_common():
+            st.progress(ratios[genre], text=f"{genre}: {genre_read[genre]}/{count} read")
+
+        if added_per_month:
+            st.write("**Books added per month:**")
+            st.bar_chart({"Books added": dict(sorted(added_per_month.items()))})
+
     def run(self):
-        menu = ["Home", "Add Book", "Remove Book", "Search Books", "View All Books", "Statistics"]
+        menu = ["Home", "Add Book", "Remove Book", "Search Books", "Filter Books", "View All Books", "Import / Export", "Statistics"]
         choice = st.sidebar.selectbox("Menu", menu)
         
         if choice == "Home":
@@ -145,8 +305,12 @@ class LibraryManager:
             self.remove_book()
         elif choice == "Search Books":
             self.search_books()
+        elif choice == "Filter Books":
+            self.filter_books()
         elif choice == "View All Books":
             self.display_books()
+        elif choice == "Import / Export":
+            self.import_export()
         elif choice == "Statistics":
             self.show_stats()
 
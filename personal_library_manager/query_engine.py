@@ -0,0 +1,223 @@
+# Multi-field filters and facets for the library
+#
+# Every book gets a doc id, i.e. a bit position. Read status, each genre and
+# each publication year own an int bitmap over those positions. Year ranges
+# bisect the sorted list of distinct years and OR their bitmaps, and a
+# conjunctive query is a handful of big-int ANDs. Facet counts are popcounts
+# of the result bitmap against each genre / read bitmap.
+
+import re
+from bisect import bisect_left, bisect_right, insort
+from itertools import islice
+
+NONZERO_BYTE = re.compile(rb"[^\x00]")
+SKIP_CHUNK_BYTES = 4096
+
+
+def iter_bits(bitmap, skip=0):
+    # Positions of set bits, lowest first; the regex skips empty bytes in C.
+    # The first `skip` set bits are passed over a chunk at a time by popcount.
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+    start = 0
+    while skip and start < len(data):
+        count = int.from_bytes(data[start:start + SKIP_CHUNK_BYTES], "little").bit_count()
+        if count > skip:
+            break
+        skip -= count
+        start += SKIP_CHUNK_BYTES
+    for match in NONZERO_BYTE.finditer(data, start):
+        base = match.start() * 8
+        byte = data[match.start()]
+        while byte:
+            low = byte & -byte
+            byte ^= low
+            if skip:
+                skip -= 1
+                continue
+            yield base + low.bit_length() - 1
+
+
+def bitmap_from_positions(positions, size):
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, "little")
+
+
+class BitmapResults:
+    # Lazy, sliceable view of the books selected by a bitmap, so a page of a
+    # huge result set can be rendered without materializing the rest
+    def __init__(self, bitmap, docs):
+        self.bitmap = bitmap
+        self.docs = docs
+        self._length = bitmap.bit_count()
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return self._iter_from(0)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if start >= stop:
+                return []
+            return list(islice(self._iter_from(start), 0, stop - start, step))
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("result index out of range")
+        return next(self._iter_from(index))
+
+    def _iter_from(self, position):
+        # Jumps straight to the page instead of walking every earlier match; a
+        # book removed after the query was run simply drops out of the page
+        docs = self.docs
+        return (docs[doc_id] for doc_id in iter_bits(self.bitmap, skip=position) if doc_id in docs)
+
+
+class BookQueryEngine:
+    def __init__(self, books=()):
+        self.docs = {}  # doc id -> book
+        self.all_bits = 0
+        self.read_bits = 0
+        self.unread_bits = 0
+        self.genre_bits = {}  # genre -> bitmap
+        self.year_bits = {}  # year -> bitmap
+        self.years = []  # sorted distinct years
+        self.ids = {}  # book id -> doc id
+        self._next_id = 0
+        self._bulk_load(books)
+
+    def add(self, book):
+        doc_id = self._next_id
+        self._next_id += 1
+        self.all_bits |= 1 << doc_id
+        self._index(doc_id, book)
+        return doc_id
+
+    def remove(self, doc_id):
+        self.all_bits &= ~(1 << doc_id)
+        self._unindex(doc_id)
+
+    def remove_book(self, book_id):
+        doc_id = self.ids.get(book_id)
+        if doc_id is not None:
+            self.remove(doc_id)
+
+    def update(self, book_id, book):
+        # Keeps the doc id, so the book stays in place in storage order
+        doc_id = self.ids[book_id]
+        self._unindex(doc_id)
+        self._index(doc_id, book)
+
+    def get(self, book_id):
+        doc_id = self.ids.get(book_id)
+        return None if doc_id is None else self.docs[doc_id]
+
+    def all_books(self):
+        return BitmapResults(self.all_bits, self.docs)
+
+    def year_range(self):
+        return (self.years[0], self.years[-1]) if self.years else (None, None)
+
+    def filter(self, year_min=None, year_max=None, read=None, genres=None):
+        bitmap = self.all_bits
+        if year_min is not None or year_max is not None:
+            start = 0 if year_min is None else bisect_left(self.years, year_min)
+            stop = len(self.years) if year_max is None else bisect_right(self.years, year_max)
+            in_range = 0
+            for year in self.years[start:stop]:
+                in_range |= self.year_bits[year]
+            bitmap &= in_range
+        if read is not None:
+            bitmap &= self.read_bits if read else self.unread_bits
+        if genres:
+            selected = 0
+            for genre in genres:
+                selected |= self.genre_bits.get(genre, 0)
+            bitmap &= selected
+        return bitmap
+
+    def facets(self, bitmap, genres=None):
+        # With a genre filter the other genres are zero by construction, so skip them
+        total = bitmap.bit_count()
+        read = (bitmap & self.read_bits).bit_count()
+        candidates = genres or self.genre_bits
+        genre_counts = {}
+        for genre in candidates:
+            count = (bitmap & self.genre_bits.get(genre, 0)).bit_count()
+            if count:
+                genre_counts[genre] = count
+        return {
+            "total": total,
+            "read": read,
+            "unread": total - read,
+            "genres": dict(sorted(genre_counts.items(), key=lambda item: -item[1])),
+        }
+
+    def query(self, year_min=None, year_max=None, read=None, genres=None, limit=None):
+        # Returns (matching books, facet counts); books keep insertion order and
+        # are a lazy BitmapResults view unless a limit is given
+        bitmap = self.filter(year_min, year_max, read, genres)
+        books = BitmapResults(bitmap, self.docs)
+        if limit is not None:
+            books = books[:limit]
+        return books, self.facets(bitmap, genres)
+
+    def _index(self, doc_id, book):
+        bit = 1 << doc_id
+        self.docs[doc_id] = book
+        if "id" in book:
+            self.ids[book["id"]] = doc_id
+        if book["read"]:
+            self.read_bits |= bit
+        else:
+            self.unread_bits |= bit
+        self.genre_bits[book["genre"]] = self.genre_bits.get(book["genre"], 0) | bit
+        year = book["year"]
+        if year not in self.year_bits:
+            self.year_bits[year] = 0
+            insort(self.years, year)
+        self.year_bits[year] |= bit
+
+    def _unindex(self, doc_id):
+        # Clears every field bitmap except all_bits
+        book = self.docs.pop(doc_id)
+        mask = ~(1 << doc_id)
+        self.read_bits &= mask
+        self.unread_bits &= mask
+        self._clear(self.genre_bits, book["genre"], mask)
+        if self._clear(self.year_bits, book["year"], mask):
+            del self.years[bisect_left(self.years, book["year"])]
+        self.ids.pop(book.get("id"), None)
+
+    def _bulk_load(self, books):
+        # Setting bits one by one on a growing int is quadratic; collect positions first
+        positions = {"read": [], "unread": []}
+        genre_positions, year_positions = {}, {}
+        for doc_id, book in enumerate(books):
+            self.docs[doc_id] = book
+            if "id" in book:
+                self.ids[book["id"]] = doc_id
+            positions["read" if book["read"] else "unread"].append(doc_id)
+            genre_positions.setdefault(book["genre"], []).append(doc_id)
+            year_positions.setdefault(book["year"], []).append(doc_id)
+
+        size = self._next_id = len(self.docs)
+        self.all_bits = (1 << size) - 1
+        self.read_bits = bitmap_from_positions(positions["read"], size)
+        self.unread_bits = bitmap_from_positions(positions["unread"], size)
+        self.genre_bits = {g: bitmap_from_positions(p, size) for g, p in genre_positions.items()}
+        self.year_bits = {y: bitmap_from_positions(p, size) for y, p in year_positions.items()}
+        self.years = sorted(self.year_bits)
+
+    @staticmethod
+    def _clear(bitmaps, key, mask):
+        # Clears the bit; returns True when the key no longer has any books
+        bitmaps[key] &= mask
+        if not bitmaps[key]:
+            del bitmaps[key]
+            return True
+        return False
@@ -0,0 +1,165 @@
+# In-memory full-text index for LibraryManager.search_books
+#
+# Title, author and genre are tokenized once when a book is added. Each field
+# keeps an inverted index (token -> doc ids), a sorted vocabulary for prefix
+# queries via bisect, and a trigram index over the vocabulary so misspelled
+# query words still find close tokens. Results are ranked by how well every
+# query word matched (exact > prefix > fuzzy).
+
+import re
+from bisect import bisect_left, insort
+
+SEARCH_FIELDS = ("title", "author", "genre")
+TOKEN_PATTERN = re.compile(r"\w+")
+
+EXACT_WEIGHT = 3.0
+PREFIX_WEIGHT = 2.0
+FUZZY_WEIGHT = 1.0
+MIN_SIMILARITY = 0.3
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class FieldIndex:
+    def __init__(self):
+        self.postings = {}  # token -> set of doc ids
+        self.vocabulary = []  # sorted tokens
+        self.grams = {}  # trigram -> set of tokens
+
+    def add(self, doc_id, tokens):
+        for token in tokens:
+            docs = self.postings.get(token)
+            if docs is None:
+                docs = self.postings[token] = set()
+                insort(self.vocabulary, token)
+                for gram in trigrams(token):
+                    self.grams.setdefault(gram, set()).add(token)
+            docs.add(doc_id)
+
+    def remove(self, doc_id, tokens):
+        for token in tokens:
+            docs = self.postings.get(token)
+            if docs is None:
+                continue
+            docs.discard(doc_id)
+            if not docs:
+                del self.postings[token]
+                del self.vocabulary[bisect_left(self.vocabulary, token)]
+                for gram in trigrams(token):
+                    tokens_with_gram = self.grams[gram]
+                    tokens_with_gram.discard(token)
+                    if not tokens_with_gram:
+                        del self.grams[gram]
+
+    def match(self, word, fuzzy=True):
+        # Returns {doc_id: weight} for the best way each doc matches `word`
+        scores = {}
+
+        def credit(docs, weight):
+            for doc_id in docs:
+                if scores.get(doc_id, 0) < weight:
+                    scores[doc_id] = weight
+
+        credit(self.postings.get(word, ()), EXACT_WEIGHT)
+
+        # Walk forward from the insertion point; slicing would copy the rest of the vocabulary
+        vocabulary = self.vocabulary
+        for position in range(bisect_left(vocabulary, word), len(vocabulary)):
+            token = vocabulary[position]
+            if not token.startswith(word):
+                break
+            if token != word:
+                credit(self.postings[token], PREFIX_WEIGHT)
+
+        if fuzzy and not scores and len(word) >= 3:
+            word_grams = trigrams(word)
+            shared = {}
+            for gram in word_grams:
+                for token in self.grams.get(gram, ()):
+                    shared[token] = shared.get(token, 0) + 1
+            for token, count in shared.items():
+                # A token of length n has at most n + 1 padded trigrams
+                similarity = count / (len(word_grams) + len(token) + 1 - count)
+                if similarity >= MIN_SIMILARITY:
+                    credit(self.postings[token], FUZZY_WEIGHT * similarity)
+        return scores
+
+
+class SearchIndex:
+    def __init__(self, books=()):
+        self.fields = {field: FieldIndex() for field in SEARCH_FIELDS}
+        self.docs = {}  # doc id -> book
+        self.tokens = {}  # doc id -> {field: tokens}
+        self.ids = {}  # book id -> doc id
+        self._next_id = 0
+        for book in books:
+            self.add(book)
+
+    def add(self, book):
+        doc_id = self._next_id
+        self._next_id += 1
+        self._index(doc_id, book)
+        return doc_id
+
+    def remove(self, doc_id):
+        self._unindex(doc_id)
+
+    def remove_book(self, book_id):
+        doc_id = self.ids.get(book_id)
+        if doc_id is not None:
+            self._unindex(doc_id)
+
+    def update(self, book_id, book):
+        # Re-tokenizes in place so the book keeps its doc id (and tie-break rank)
+        doc_id = self.ids[book_id]
+        self._unindex(doc_id)
+        self._index(doc_id, book)
+
+    def _index(self, doc_id, book):
+        self.docs[doc_id] = book
+        self.tokens[doc_id] = {}
+        for field, index in self.fields.items():
+            tokens = set(tokenize(book.get(field, "")))
+            self.tokens[doc_id][field] = tokens
+            index.add(doc_id, tokens)
+        if "id" in book:
+            self.ids[book["id"]] = doc_id
+
+    def _unindex(self, doc_id):
+        book = self.docs.pop(doc_id)
+        for field, tokens in self.tokens.pop(doc_id).items():
+            self.fields[field].remove(doc_id, tokens)
+        self.ids.pop(book.get("id"), None)
+
+    def search(self, query, fields=SEARCH_FIELDS, limit=None, fuzzy=True):
+        words = tokenize(query)
+        if not words:
+            return []
+
+        totals = None
+        for word in words:
+            # A word may match in any of the requested fields; keep its best weight
+            word_scores = {}
+            for field in fields:
+                for doc_id, weight in self.fields[field].match(word, fuzzy).items():
+                    if word_scores.get(doc_id, 0) < weight:
+                        word_scores[doc_id] = weight
+            if totals is None:
+                totals = word_scores
+            else:
+                # Every query word has to match
+                totals = {d: totals[d] + w for d, w in word_scores.items() if d in totals}
+            if not totals:
+                return []
+
+        ranked = sorted(totals.items(), key=lambda item: (-item[1], item[0]))
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [self.docs[doc_id] for doc_id, _ in ranked]
@@ -0,0 +1,543 @@
+# Storage backends for the Personal Library Manager
+#
+# LibraryManager talks to a storage object instead of rewriting library.json
+# itself. Every book carries a stable "id" and every backend supports load /
+# add / update / remove by that id, so a
+# mutation only costs what the backend needs for one row:
+#   - JsonStorage: the original whole-file library.json format (it also reads
+#     and keeps the {"seq", "books"} snapshot JournalStorage compacts into)
+#   - JournalStorage: plain JSON snapshot plus an append-only JSON-lines log,
+#     compacted into a new snapshot (atomic rename) once the log grows
+#   - SqliteStorage: WAL-mode SQLite with per-row inserts/deletes and indexes
+#
+# has_external_changes() tells a long-lived cache whether someone else (another
+# process, a hand edit) changed the library since this object last read or
+# wrote it: file mtime/size for the JSON backends, PRAGMA data_version for SQLite.
+#
+# The backend is picked with LIBRARY_BACKEND (json | journal | sqlite) and LIBRARY_PATH.
+# Migrate an existing library with: python storage.py library.json library.db
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import contextmanager
+from os import path
+
+BOOK_FIELDS = ("id", "title", "author", "year", "genre", "read", "added_date")
+INDEXED_COLUMNS = ("title", "author", "genre", "year")
+# A bulk import drops the indexes (and rebuilds them once at the end)
+# only after it has grown past this many rows and past half the existing table;
+# smaller imports just insert through the indexes
+BULK_REBUILD_MIN_ROWS = 50_000
+SELECT_BOOKS = "SELECT book_id, title, author, year, genre, read, added_date FROM books ORDER BY id"
+
+
+def new_book_id():
+    # 128 random bits as hex; os.urandom is several times cheaper than uuid4 on bulk imports
+    return os.urandom(16).hex()
+
+
+def file_signature(*paths):
+    # (mtime, size) per file, None for a missing one; a stat, not a read
+    signature = []
+    for file_path in paths:
+        try:
+            stat = os.stat(file_path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def ensure_id(book):
+    # Books from older libraries and from imports get an id on first sight
+    if not book.get("id"):
+        book["id"] = new_book_id()
+    return book
+
+
+class LibraryStorage:
+    def load(self):
+        raise NotImplementedError
+
+    def add(self, book):
+        raise NotImplementedError
+
+    def add_many(self, books):
+        for book in books:
+            self.add(book)
+
+    def iter_books(self, batch_size=10_000):
+        # Backends that can stream rows override this
+        return iter(self.load())
+
+    @contextmanager
+    def bulk_load(self):
+        # Wraps a run of add_many calls; backends may defer index upkeep inside it
+        yield
+
+    def has_external_changes(self):
+        return False
+
+    def update(self, book_id, changes):
+        raise NotImplementedError
+
+    def remove(self, book_id):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class JsonStorage(LibraryStorage):
+    def __init__(self, file_path="library.json"):
+        self.file_path = file_path
+        self.books = {}  # id -> book, in insertion order
+        self._loaded = False
+        self._deferred = False
+        self._signature = None
+        self._snapshot_seq = None  # set when the file is a JournalStorage snapshot
+
+    def load(self):
+        self.books = {}
+        missing_ids = False
+        self._snapshot_seq = None
+        if path.exists(self.file_path):
+            with open(self.file_path, "r") as file:
+                data = json.load(file)
+            if isinstance(data, dict):
+                # Compacted by JournalStorage; written back in the same shape
+                self._snapshot_seq, data = data["seq"], data["books"]
+            for book in data:
+                missing_ids = missing_ids or not book.get("id")
+                self.books[ensure_id(book)["id"]] = book
+        self._loaded = True
+        if missing_ids:
+            self._write()
+        self._signature = file_signature(self.file_path)
+        # Copies: callers index these dicts, and update() mutates ours in place
+        return [dict(book) for book in self.books.values()]
+
+    def add(self, book):
+        self.add_many([book])
+
+    def add_many(self, books):
+        for book in books:
+            self.books[ensure_id(book)["id"]] = dict(book)
+        self._write()
+
+    def update(self, book_id, changes):
+        self.books[book_id].update(changes)
+        self._write()
+
+    def remove(self, book_id):
+        del self.books[book_id]
+        self._write()
+
+    @contextmanager
+    def bulk_load(self):
+        # Rewrite the file once for the whole import instead of once per batch
+        if not self._loaded:
+            self.load()
+        self._deferred = True
+        try:
+            yield
+        finally:
+            self._deferred = False
+            self._write()
+
+    def has_external_changes(self):
+        return file_signature(self.file_path) != self._signature
+
+    def _write(self):
+        if self._deferred:
+            return
+        books = list(self.books.values())
+        if self._snapshot_seq is not None:
+            books = {"seq": self._snapshot_seq, "books": books}
+        with open(self.file_path, "w") as file:
+            json.dump(books, file, indent=4)
+        self._signature = file_signature(self.file_path)
+
+
+class JournalStorage(LibraryStorage):
+    # Snapshot: {"seq": N, "books": [...]} (a legacy plain list is read as seq 0).
+    # Journal: one {"seq", "op", ...} object per line. Replay skips entries
+    # already folded into the snapshot, so a crash at any point of compaction
+    # leaves a consistent library, and a torn final line is simply ignored.
+
+    def __init__(self, file_path="library.json", compact_after=10_000, background=True, fsync=False):
+        self.file_path = file_path
+        self.journal_path = f"{file_path}.log"
+        self.compact_after = compact_after
+        self.background = background
+        self.fsync = fsync
+
+        self._lock = threading.RLock()
+        self._compacting = False
+        self._books = {}  # id -> book, in insertion order
+        self._missing_ids = False
+        self._seq = 0
+        self._journal_entries = 0
+        self._journal = None
+        self._signature = None
+        self._unflushed = False
+        self._in_step = True  # no one else had written when the unflushed entries started
+
+    def load(self):
+        with self._lock:
+            self._books, self._missing_ids = {}, False
+            snapshot_seq = 0
+            if path.exists(self.file_path):
+                with open(self.file_path, "r") as file:
+                    snapshot = json.load(file)
+                if isinstance(snapshot, list):
+                    snapshot = {"seq": 0, "books": snapshot}
+                snapshot_seq = snapshot["seq"]
+                for book in snapshot["books"]:
+                    self._apply_add(book)
+
+            self._seq = snapshot_seq
+            self._journal_entries = 0
+            if path.exists(self.journal_path):
+                good_end = 0  # byte offset just past the last complete entry
+                with open(self.journal_path, "rb") as file:
+                    for line in file:
+                        if not line.endswith(b"\n"):
+                            break  # torn write from a crash: it was never acknowledged
+                        try:
+                            entry = json.loads(line)
+                        except ValueError:
+                            break
+                        good_end += len(line)
+                        if entry["seq"] <= snapshot_seq:
+                            continue
+                        self._apply(entry)
+                        self._seq = entry["seq"]
+                        self._journal_entries += 1
+                if good_end < path.getsize(self.journal_path):
+                    # Cut the torn tail off, or the next append would be glued onto it
+                    # and lost (with everything after it) on the following replay
+                    os.truncate(self.journal_path, good_end)
+
+            # Always reopen: another process may have compacted the journal
+            # (os.replace), and the old handle would append to the unlinked file
+            if self._journal is not None:
+                self._journal.close()
+            self._journal = open(self.journal_path, "a")
+            self._signature = file_signature(self.file_path, self.journal_path)
+        if self._missing_ids:
+            # Ids handed out to legacy books only exist in memory until a snapshot holds them
+            self.compact()
+        # Copies: callers index these dicts, and replayed updates mutate ours in place
+        return [dict(book) for book in self._books.values()]
+
+    def add(self, book):
+        self._append({"op": "add", "book": ensure_id(book)})
+
+    def add_many(self, books):
+        for book in books:
+            self._append({"op": "add", "book": ensure_id(book)}, flush=False)
+        self._flush()
+
+    def update(self, book_id, changes):
+        self._append({"op": "update_id", "id": book_id, "changes": changes})
+
+    def remove(self, book_id):
+        self._append({"op": "remove_id", "id": book_id})
+
+    def compact(self):
+        with self._lock:
+            if self._compacting:
+                return
+            self._compacting = True
+            seq = self._seq
+            books = [dict(book) for book in self._books.values()]
+        try:
+            self._write_snapshot(seq, books)
+            with self._lock:
+                self._rewrite_journal_after(seq)
+                self._missing_ids = False
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def has_external_changes(self):
+        with self._lock:
+            return file_signature(self.file_path, self.journal_path) != self._signature
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    # ----- Internals -----
+    def _append(self, entry, flush=True):
+        with self._lock:
+            if self._journal is None:
+                self.load()
+            if not self._unflushed:
+                self._in_step = file_signature(self.file_path, self.journal_path) == self._signature
+                self._unflushed = True
+            self._seq += 1
+            entry["seq"] = self._seq
+            self._journal.write(json.dumps(entry) + "\n")
+            self._apply(entry)
+            self._journal_entries += 1
+            if flush:
+                self._flush()
+            needs_compaction = self._journal_entries >= self.compact_after and not self._compacting
+
+        if needs_compaction:
+            if self.background:
+                threading.Thread(target=self.compact, daemon=True).start()
+            else:
+                self.compact()
+
+    def _flush(self):
+        with self._lock:
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+            # If another process wrote before us, keep the old signature so
+            # has_external_changes() still reports their entries
+            if self._in_step:
+                self._signature = file_signature(self.file_path, self.journal_path)
+            self._unflushed = False
+
+    def _apply(self, entry):
+        op = entry["op"]
+        if op == "add":
+            self._apply_add(entry["book"])
+        elif op == "update_id":
+            book = self._books.get(entry["id"])
+            if book is not None:
+                book.update(entry["changes"])
+        elif op == "remove_id":
+            self._books.pop(entry["id"], None)
+        # Title-keyed entries only appear in journals written before books had ids
+        elif op == "update":
+            for book in self._books.values():
+                if book["title"] == entry["title"]:
+                    book.update(entry["changes"])
+        elif op == "remove":
+            self._books = {i: book for i, book in self._books.items() if book["title"] != entry["title"]}
+
+    def _apply_add(self, book):
+        book = dict(book)
+        if not book.get("id"):
+            self._missing_ids = True
+        book_id = ensure_id(book)["id"]
+        self._books[book_id] = book
+
+    def _write_snapshot(self, seq, books):
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "w") as file:
+            json.dump({"seq": seq, "books": books}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.file_path)
+
+    def _rewrite_journal_after(self, seq):
+        # Keep only entries appended while the snapshot was being written
+        self._journal.flush()
+        tail = []
+        with open(self.journal_path, "r") as file:
+            for line in file:
+                try:
+                    if json.loads(line)["seq"] > seq:
+                        tail.append(line)
+                except ValueError:
+                    break
+        tmp_path = f"{self.journal_path}.tmp"
+        with open(tmp_path, "w") as file:
+            file.writelines(tail)
+            file.flush()
+            os.fsync(file.fileno())
+        self._journal.close()
+        os.replace(tmp_path, self.journal_path)
+        self._journal = open(self.journal_path, "a")
+        self._journal_entries = len(tail)
+        self._signature = file_signature(self.file_path, self.journal_path)
+
+
+class SqliteStorage(LibraryStorage):
+    def __init__(self, file_path="library.db"):
+        self.file_path = file_path
+        self.conn = sqlite3.connect(file_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS books (
+                id INTEGER PRIMARY KEY,
+                book_id TEXT,
+                title TEXT NOT NULL,
+                author TEXT NOT NULL,
+                year INTEGER,
+                genre TEXT,
+                read INTEGER NOT NULL DEFAULT 0,
+                added_date TEXT
+            );
+        """)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(books)")]
+        if "book_id" not in columns:
+            # Libraries created before stable ids: add the column and backfill it
+            with self.conn:
+                self.conn.execute("ALTER TABLE books ADD COLUMN book_id TEXT")
+        with self.conn:
+            self.conn.execute("UPDATE books SET book_id = lower(hex(randomblob(16))) WHERE book_id IS NULL")
+        self._create_indexes()
+        self._data_version = self._current_data_version()
+        self._bulk = None  # during bulk_load: [rows before, rows inserted, indexes dropped]
+
+    def load(self):
+        self._data_version = self._current_data_version()
+        return [self._to_book(row) for row in self.conn.execute(SELECT_BOOKS)]
+
+    def has_external_changes(self):
+        # data_version only moves for commits made through other connections
+        return self._current_data_version() != self._data_version
+
+    def add(self, book):
+        self.add_many([book])
+
+    def add_many(self, books):
+        if self._bulk is not None:
+            books = list(books)
+            self._bulk[1] += len(books)
+            if not self._bulk[2] and self._bulk[1] >= max(BULK_REBUILD_MIN_ROWS, self._bulk[0] // 2):
+                self._drop_indexes()
+                self._bulk[2] = True
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO books (book_id, title, author, year, genre, read, added_date) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._to_row(ensure_id(book)) for book in books),
+            )
+
+    def update(self, book_id, changes):
+        columns = [field for field in BOOK_FIELDS if field in changes and field != "id"]
+        if not columns:
+            return
+        values = [int(bool(changes[c])) if c == "read" else changes[c] for c in columns]
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self.conn:
+            self.conn.execute(f"UPDATE books SET {assignments} WHERE book_id = ?", (*values, book_id))
+
+    def remove(self, book_id):
+        with self.conn:
+            self.conn.execute("DELETE FROM books WHERE book_id = ?", (book_id,))
+
+    def iter_books(self, batch_size=10_000):
+        # Streams rows in storage order without loading the whole table
+        cursor = self.conn.cursor()
+        cursor.execute(SELECT_BOOKS)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            for row in rows:
+                yield self._to_book(row)
+
+    @contextmanager
+    def bulk_load(self):
+        # Inserting into four secondary B-trees slows down as the table grows;
+        # once an import is large, appending to the bare table and rebuilding
+        # the indexes once keeps it linear
+        self._bulk = [self.count(), 0, False]
+        try:
+            yield
+        finally:
+            dropped, self._bulk = self._bulk[2], None
+            if dropped:
+                self._create_indexes()
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM books").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+    def _current_data_version(self):
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _drop_indexes(self):
+        with self.conn:
+            self.conn.execute("DROP INDEX IF EXISTS idx_books_book_id")
+            for column in INDEXED_COLUMNS:
+                self.conn.execute(f"DROP INDEX IF EXISTS idx_books_{column}")
+
+    def _create_indexes(self):
+        # Secondary indexes first: they can't fail, so the table is never left bare
+        with self.conn:
+            for column in INDEXED_COLUMNS:
+                self.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_books_{column} ON books ({column})")
+        try:
+            with self.conn:
+                self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_books_book_id ON books (book_id)")
+        except sqlite3.IntegrityError:
+            # Duplicate ids slipped in while the index was down: the oldest row keeps its id
+            with self.conn:
+                self.conn.execute(
+                    "UPDATE books SET book_id = lower(hex(randomblob(16))) "
+                    "WHERE id NOT IN (SELECT min(id) FROM books GROUP BY book_id)"
+                )
+                self.conn.execute("CREATE UNIQUE INDEX idx_books_book_id ON books (book_id)")
+
+    @staticmethod
+    def _to_row(book):
+        return (
+            book["id"],
+            book["title"],
+            book["author"],
+            int(book["year"]),
+            book["genre"],
+            int(bool(book["read"])),
+            book.get("added_date"),
+        )
+
+    @staticmethod
+    def _to_book(row):
+        book = dict(zip(BOOK_FIELDS, row))
+        book["read"] = bool(book["read"])
+        return book
+
+
+def migrate_json_to_sqlite(json_path="library.json", db_path="library.db"):
+    # One-shot import of an existing library.json into an empty SQLite library
+    storage = SqliteStorage(db_path)
+    try:
+        if storage.count() == 0 and path.exists(json_path):
+            with open(json_path, "r") as file, storage.bulk_load():
+                storage.add_many(json.load(file))
+        return storage.count()
+    finally:
+        storage.close()
+
+
+def get_storage(backend=None, file_path=None):
+    backend = backend or os.getenv("LIBRARY_BACKEND", "sqlite")
+    file_path = file_path or os.getenv("LIBRARY_PATH")
+    if backend == "json":
+        return JsonStorage(file_path or "library.json")
+    if backend == "journal":
+        return JournalStorage(
+            file_path or "library.json",
+            compact_after=int(os.getenv("LIBRARY_COMPACT_AFTER", "10000")),
+            fsync=os.getenv("LIBRARY_FSYNC", "") == "1",
+        )
+    if backend == "sqlite":
+        db_path = file_path or "library.db"
+        if not path.exists(db_path):
+            migrate_json_to_sqlite("library.json", db_path)
+        return SqliteStorage(db_path)
+    raise ValueError(f"Unknown library backend: {backend}")
+
+
+if __name__ == "__main__":
+    json_path = sys.argv[1] if len(sys.argv) > 1 else "library.json"
+    db_path = sys.argv[2] if len(sys.argv) > 2 else "library.db"
+    print(f"{db_path} now holds {migrate_json_to_sqlite(json_path, db_path)} books")
@@ -0,0 +1,49 @@
+# Multi-process freshness of LibraryState: two instances stand in for two processes
+# Run with: python -m pytest test_library_cache.py
+
+import pytest
+
+from library_cache import LibraryState
+from storage import JournalStorage, SqliteStorage
+
+
+def make_book(i):
+    return {"title": f"Book {i}", "author": "Author", "year": 2000, "genre": "Fiction",
+            "read": False, "added_date": "2024-01-01"}
+
+
+def titles(state):
+    return sorted(book["title"] for book in state.snapshot())
+
+
+@pytest.mark.parametrize("make_storage", [
+    lambda tmp_path: JournalStorage(str(tmp_path / "library.json"), compact_after=10 ** 9),
+    lambda tmp_path: SqliteStorage(str(tmp_path / "library.db")),
+], ids=["journal", "sqlite"])
+def test_state_sees_changes_from_another_instance(tmp_path, make_storage):
+    first = LibraryState(make_storage(tmp_path), check_interval=0)
+    second = LibraryState(make_storage(tmp_path), check_interval=0)
+    for i in range(3):
+        first.add(make_book(i))
+
+    assert second.refresh_if_changed()
+    assert titles(second) == ["Book 0", "Book 1", "Book 2"]
+
+    # Compact in one instance, add in the other, then each reloads
+    if hasattr(second.storage, "compact"):
+        second.storage.compact()
+    first.refresh_if_changed()
+    first.add(make_book(3))
+    second.add(make_book(4))
+
+    assert first.refresh_if_changed()
+    assert second.refresh_if_changed()
+    expected = [f"Book {i}" for i in range(5)]
+    assert titles(first) == expected and titles(second) == expected
+    assert not first.refresh_if_changed()
+
+    first.storage.close()
+    second.storage.close()
+    fresh = make_storage(tmp_path)
+    assert sorted(book["title"] for book in fresh.load()) == expected
+    fresh.close()
@@ -0,0 +1,86 @@
+# Regression tests for the storage backends
+# Run with: python -m pytest test_storage.py
+
+from storage import JournalStorage, JsonStorage
+
+
+def make_book(i):
+    return {"title": f"Book {i}", "author": "Author", "year": 2000, "genre": "Fiction",
+            "read": False, "added_date": "2024-01-01"}
+
+
+def test_journal_survives_torn_append(tmp_path):
+    library_path = str(tmp_path / "library.json")
+    storage = JournalStorage(library_path, compact_after=10 ** 9)
+    storage.load()
+    for i in range(3):
+        storage.add(make_book(i))
+    storage.close()
+
+    # Crash halfway through writing the next entry
+    with open(storage.journal_path, "a") as file:
+        file.write('{"op": "add", "bo')
+
+    storage = JournalStorage(library_path, compact_after=10 ** 9)
+    assert len(storage.load()) == 3
+    for i in range(3, 5):
+        storage.add(make_book(i))
+    storage.close()
+
+    # Adds acknowledged after the crash must not be glued onto the torn line
+    storage = JournalStorage(library_path, compact_after=10 ** 9)
+    assert [book["title"] for book in storage.load()] == [f"Book {i}" for i in range(5)]
+    storage.close()
+
+
+def test_update_does_not_touch_loaded_books(tmp_path):
+    # Loaded dicts become the indexes' docs; updating storage must not change them
+    # under the indexes before they unindex the old values
+    for storage in (JsonStorage(str(tmp_path / "a.json")), JournalStorage(str(tmp_path / "b.json"))):
+        storage.load()
+        storage.add(make_book(0))
+        book = storage.load()[0]
+        storage.update(book["id"], {"read": True, "title": "Renamed"})
+        assert book["read"] is False and book["title"] == "Book 0"
+        assert storage.load()[0]["title"] == "Renamed"
+        storage.close()
+
+
+def test_journal_reload_after_compaction_elsewhere(tmp_path):
+    library_path = str(tmp_path / "library.json")
+    first = JournalStorage(library_path, compact_after=10 ** 9)
+    first.load()
+    for i in range(3):
+        first.add(make_book(i))
+
+    # Another process compacts, replacing the journal file under our append handle
+    second = JournalStorage(library_path, compact_after=10 ** 9)
+    second.load()
+    second.compact()
+    second.close()
+
+    first.load()
+    first.add(make_book(3))
+    first.close()
+
+    fresh = JournalStorage(library_path)
+    assert [book["title"] for book in fresh.load()] == [f"Book {i}" for i in range(4)]
+    fresh.close()
+
+
+def test_json_storage_reads_compacted_snapshot(tmp_path):
+    library_path = str(tmp_path / "library.json")
+    journal = JournalStorage(library_path, compact_after=10 ** 9)
+    journal.load()
+    for i in range(3):
+        journal.add(make_book(i))
+    journal.compact()
+    journal.close()
+
+    storage = JsonStorage(library_path)
+    assert [book["title"] for book in storage.load()] == [f"Book {i}" for i in range(3)]
+    storage.add(make_book(3))
+
+    journal = JournalStorage(library_path)
+    assert [book["title"] for book in journal.load()] == [f"Book {i}" for i in range(4)]
+    journal.close()
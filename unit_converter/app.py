@@ -1,8 +1,16 @@
 import streamlit as st
-import requests
 import os
+import uuid
+from decimal import Decimal
 from dotenv import load_dotenv
 import google.generativeai as genai
+import pandas as pd
+from converter import UNITS, convert, convert_array, format_conversion, to_csv_bytes
+from currency import format_money, get_currency_engine
+from llm_client import LLMClient, LLMUnavailable
+from nl_parser import ConversionParser
+from rates import RateStore
+from response_cache import ResponseCache
 
 # Load environment variables
 load_dotenv()
@@ -47,22 +55,79 @@ st.sidebar.markdown("## 🔄 Smart Converter")
 st.sidebar.markdown("Built with Gemini AI")
 
 # API functions
+@st.cache_resource
+def get_gemini_model():
+    return genai.GenerativeModel("gemini-2.0-flash")
+
+
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(
+        max_entries=int(os.getenv("GEMINI_CACHE_SIZE", "1024")),
+        ttl=int(os.getenv("GEMINI_CACHE_TTL", str(24 * 3600))),
+        disk_path=os.getenv("GEMINI_CACHE_PATH"),
+    )
+
+
+def generate_gemini_text(prompt):
+    response = get_gemini_model().generate_content(prompt)
+    return response.text
+
+
+@st.cache_resource
+def get_llm_client():
+    return LLMClient(
+        generate_gemini_text,
+        max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+        timeout=float(os.getenv("GEMINI_TIMEOUT", "20")),
+    )
+
+
 def get_gemini_response(prompt):
     if not GEMINI_API_KEY:
         st.sidebar.warning("⚠️ Gemini API key not set. Using fallback mode.")
 
-    model = genai.GenerativeModel("gemini-2.0-flash")
-    response = model.generate_content(prompt)
-    return response.text
+    if "llm_session_id" not in st.session_state:
+        st.session_state.llm_session_id = uuid.uuid4().hex
+    session_id = st.session_state.llm_session_id
+
+    try:
+        return get_response_cache().get_or_compute(
+            prompt, lambda p: get_llm_client().ask(p, session_id=session_id)
+        )
+    except LLMUnavailable as e:
+        # Callers only get here once the local engine has already passed, so a
+        # missed deadline or a full pool can only be answered with a fixed message
+        return f"{e}. Please try again in a moment."
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def get_converted_csv(values, column):
+    # Encoded once per converted column, not on every rerun of the page
+    return to_csv_bytes(values, column)
+
+
+@st.cache_resource
+def get_rate_store():
+    return RateStore()
 
 
 def get_currency_rates():
-    CURRENCY_API_URL = "https://open.er-api.com/v6/latest/USD"
-    response = requests.get(CURRENCY_API_URL)
-    data = response.json()
-    rates = data["rates"]
-    rates["timestamp"] = data["time_last_update_utc"]
-    return rates
+    return get_rate_store().get_rates()
+
+
+def answer_locally(text):
+    # Resolve plainly parseable requests without a network call; None means "ask the LLM"
+    parsed = chat_parser.parse(text)
+    if parsed is None:
+        return None
+    try:
+        if parsed.kind == "unit":
+            return format_conversion(convert(parsed.value, parsed.from_unit, parsed.to_unit), parsed.to_unit)
+        engine = get_currency_engine(get_currency_rates())
+        return format_money(engine.convert(parsed.value, parsed.from_unit, parsed.to_unit), parsed.to_unit)
+    except (ValueError, RuntimeError):
+        return None
 
 
 def create_ai_prompt(text):
@@ -84,12 +149,21 @@ converter_type = st.sidebar.radio(
     "Converter Type", ["Unit Converter", "Currency Converter"]
 )
 
+# LLM cache stats
+llm_cache_stats = get_response_cache().stats()
+st.sidebar.caption(
+    f"🧠 AI cache: {llm_cache_stats['hits']} hits / {llm_cache_stats['misses']} misses "
+    f"· ~{llm_cache_stats['saved_seconds']:.1f}s saved"
+)
+
 # Title
 st.title("🔄 Smart Converter")
 
 # Tabs
 tab1, tab2 = st.tabs(["💬 Chat Interface", "📊 Selection Interface"])
 
+chat_parser = ConversionParser()
+
 # ----------- Tab 1: Chat Interface -----------
 with tab1:
     st.subheader("Natural Language Conversion")
@@ -109,8 +183,9 @@ with tab1:
 
         with st.chat_message("assistant"):
             with st.spinner("Converting..."):
-                ai_prompt = create_ai_prompt(prompt)
-                response = get_gemini_response(ai_prompt)
+                response = answer_locally(prompt)
+                if response is None:
+                    response = get_gemini_response(create_ai_prompt(prompt))
                 st.markdown(f"✅ {response}")
                 st.session_state.messages.append({"role": "assistant", "content": response})
 
@@ -119,43 +194,61 @@ with tab2:
     st.subheader("Manual Selection Conversion")
 
     if converter_type == "Unit Converter":
-        category = st.selectbox(
-            "Measurement Category",
-            ["Length", "Weight", "Volume", "Temperature", "Area", "Time", "Data", "Speed"]
-        )
-
-        units = {
-            "Length": ["Meter", "Kilometer", "Centimeter", "Millimeter", "Inch", "Foot", "Yard", "Mile"],
-            "Weight": ["Gram", "Kilogram", "Milligram", "Pound", "Ounce", "Ton"],
-            "Volume": ["Liter", "Milliliter", "Cubic Meter", "Gallon", "Quart", "Pint", "Cup"],
-            "Temperature": ["Celsius", "Fahrenheit", "Kelvin"],
-            "Area": ["Square Meter", "Square Kilometer", "Square Centimeter", "Square Inch", "Square Foot", "Acre", "Hectare"],
-            "Time": ["Second", "Millisecond", "Minute", "Hour", "Day", "Week", "Month", "Year"],
-            "Data": ["Byte", "Kilobyte", "Megabyte", "Gigabyte", "Terabyte", "Bit"],
-            "Speed": ["Meter per Second", "Kilometer per Hour", "Mile per Hour", "Knot"]
-        }
+        category = st.selectbox("Measurement Category", list(UNITS))
 
         col1, col2 = st.columns(2)
         with col1:
-            from_unit = st.selectbox("From", units[category])
+            from_unit = st.selectbox("From", UNITS[category])
             value = st.number_input("Value", value=1.0, step=0.1)
 
         with col2:
-            to_unit = st.selectbox("To", units[category])
+            to_unit = st.selectbox("To", UNITS[category])
 
         if st.button("Convert Units"):
-            with st.spinner("Processing..."):
-                prompt = f"Convert {value} {from_unit} to {to_unit}"
-                result = get_gemini_response(create_ai_prompt(prompt))
-                st.success(result)
+            try:
+                result = format_conversion(convert(value, from_unit, to_unit), to_unit)
+            except ValueError:
+                # Only fall back to the LLM when the local engine can't handle the pair
+                with st.spinner("Processing..."):
+                    prompt = f"Convert {value} {from_unit} to {to_unit}"
+                    result = get_gemini_response(create_ai_prompt(prompt))
+            st.success(result)
+
+        with st.expander(f"📁 Batch Conversion: {from_unit} → {to_unit}"):
+            uploaded_file = st.file_uploader("Upload a CSV of measurements", type="csv")
+            if uploaded_file is not None:
+                df = pd.read_csv(uploaded_file)
+                numeric_columns = list(df.select_dtypes("number").columns)
+                if not numeric_columns:
+                    st.warning("No numeric columns found in this file.")
+                else:
+                    column = st.selectbox("Column to convert", numeric_columns)
+                    converted = convert_array(df[column].to_numpy(), from_unit, to_unit)
+                    st.caption(f"Converted {len(converted):,} values")
+                    st.dataframe(
+                        pd.DataFrame({f"{column} ({from_unit})": df[column].head(100), to_unit: converted[:100]}),
+                        use_container_width=True,
+                    )
+                    st.download_button(
+                        "⬇️ Download converted column",
+                        data=get_converted_csv(converted, to_unit),
+                        file_name=f"converted_{to_unit.lower().replace(' ', '_')}.csv",
+                        mime="text/csv",
+                    )
 
     else:
         with st.spinner("Fetching currency rates..."):
-            rates = get_currency_rates()
-            currencies = [k for k in rates.keys() if k != "timestamp"]
+            try:
+                rates = get_currency_rates()
+            except RuntimeError as e:
+                st.error(f"⚠️ {e}")
+                st.stop()
+            engine = get_currency_engine(rates)
+            currencies = engine.currencies
             last_updated = rates["timestamp"]
 
-        st.caption(f"💱 Exchange rates updated: {last_updated}")
+        cache_stats = get_rate_store().stats()
+        st.caption(f"💱 Exchange rates updated: {last_updated} · cache hit rate {cache_stats['hit_rate']:.0%}")
 
         col1, col2 = st.columns(2)
         with col1:
@@ -166,9 +259,9 @@ with tab2:
             to_currency = st.selectbox("To Currency", currencies)
 
         if st.button("Convert Currency"):
-            prompt = f"Convert {amount} {from_currency} to {to_currency}"
-            result = get_gemini_response(create_ai_prompt(prompt))
-            st.success(result)
+            result = engine.convert(amount, from_currency, to_currency)
+            st.success(f"{format_money(Decimal(str(amount)), from_currency)} = {format_money(result, to_currency)}")
+            st.caption(f"1 {from_currency} = {engine.rate(from_currency, to_currency):.6f} {to_currency}")
 
 # ----------- Footer -----------
 st.markdown(
@@ -0,0 +1,189 @@
+# Micro-benchmarks for the local conversion engine
+# Run with: python benchmark.py
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from converter import convert, convert_array
+from currency import CurrencyEngine
+from llm_client import LLMClient, LLMTimeout, LLMUnavailable
+from nl_parser import ConversionParser
+from rates import RateStore
+
+
+def bench_single_conversion(iterations=100_000):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        convert(1.0, "Fahrenheit", "Celsius")
+    elapsed = time.perf_counter() - start
+    print(f"Single conversion: {elapsed / iterations * 1e6:.3f} µs per call")
+
+
+def bench_batch_conversion(rows=1_000_000):
+    values = np.random.default_rng(0).uniform(-1000, 1000, rows)
+    start = time.perf_counter()
+    convert_array(values, "Mile", "Kilometer")
+    elapsed = time.perf_counter() - start
+    print(f"Batch conversion: {rows:,} rows in {elapsed * 1000:.2f} ms "
+          f"({rows / elapsed:,.0f} values/sec)")
+
+
+SAMPLE_PROMPTS = [
+    "Convert 10 USD to INR",
+    "5 meters in feet",
+    "how many feet in 3 miles",
+    "5km to miles",
+    "$20 to eur",
+    "100 degrees fahrenheit to celsius",
+    "32 F in C",
+    "1,000 lbs to kg?",
+    "what is 60 mph in km/h",
+    "10 sq ft to m2",
+    "2 in to cm",
+    "5 cups to liters",
+    "1 GB in MB",
+    "3.5 hours to minutes",
+    "how many inr is 10 usd",
+    "hi",
+    "what's heavier, a kilo of feathers or a kilo of steel?",
+    "convert half a mile to meters",
+    "How long is a light year in km",
+    "12 stone to kg",
+]
+
+
+def bench_chat_parser(rounds=1_000):
+    parser = ConversionParser(currencies=["USD", "INR", "EUR", "PKR", "GBP"])
+    handled = sum(parser.parse(prompt) is not None for prompt in SAMPLE_PROMPTS)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for prompt in SAMPLE_PROMPTS:
+            parser.parse(prompt)
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / (rounds * len(SAMPLE_PROMPTS))
+    print(f"Chat parser: {per_call * 1e6:.2f} µs per prompt, "
+          f"{handled}/{len(SAMPLE_PROMPTS)} ({handled / len(SAMPLE_PROMPTS):.0%}) resolved without the LLM")
+
+
+class FakeSlowModel:
+    # Stand-in for Gemini whose latency is controlled by the caller
+    def __init__(self, delay):
+        self.delay = delay
+
+    def __call__(self, prompt):
+        time.sleep(self.delay)
+        return f"echo: {prompt}"
+
+
+def bench_llm_deadlines():
+    client = LLMClient(FakeSlowModel(2.0), max_concurrency=2, timeout=0.2)
+    start = time.perf_counter()
+    try:
+        client.ask("5 meters in feet", session_id="a")
+    except LLMTimeout:
+        pass
+    print(f"LLM deadline: slow call abandoned after {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    # Fill the pool, then show that extra work is rejected instead of queued
+    client.submit("busy 1")
+    rejected_at = time.perf_counter()
+    try:
+        client.submit("busy 2")
+        client.submit("busy 3")
+    except LLMUnavailable:
+        pass
+    print(f"LLM concurrency cap: extra request rejected in "
+          f"{(time.perf_counter() - rejected_at) * 1e6:.0f} µs, stats {client.stats()}")
+
+    fast = LLMClient(FakeSlowModel(0.05), max_concurrency=2, timeout=1.0)
+    fast.submit("old prompt", session_id="b")
+    print(f"LLM answer for newest prompt: {fast.ask('new prompt', session_id='b')!r}, stats {fast.stats()}")
+
+
+class StubRateHandler(BaseHTTPRequestHandler):
+    # Minimal stand-in for open.er-api.com that honours If-None-Match
+    payload = {
+        "result": "success",
+        "time_last_update_utc": "Sat, 17 Oct 2026 00:00:01 +0000",
+        "time_next_update_unix": 0,
+        "rates": {"USD": 1, "EUR": 0.92, "INR": 83.1, "PKR": 278.5},
+    }
+    etag = '"stub-v1"'
+    requests_served = 0
+
+    def do_GET(self):
+        StubRateHandler.requests_served += 1
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(self.payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def bench_rate_store(lookups=10_000):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubRateHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/v6/latest/USD"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot_path = os.path.join(tmp, "rates_snapshot.json")
+
+        store = RateStore(url=url, snapshot_path=snapshot_path, min_refresh_interval=3600)
+        start = time.perf_counter()
+        for _ in range(lookups):
+            store.get_rates()
+        elapsed = time.perf_counter() - start
+        stats = store.stats()
+        print(f"Rate store: {elapsed / lookups * 1e6:.2f} µs per lookup, "
+              f"hit rate {stats['hit_rate']:.2%}, upstream requests {StubRateHandler.requests_served}")
+
+        # A second process start should be served from the snapshot without blocking
+        start = time.perf_counter()
+        warm = RateStore(url=url, snapshot_path=snapshot_path)
+        warm.get_rates()
+        print(f"Rate store warm start from snapshot: {(time.perf_counter() - start) * 1000:.2f} ms")
+
+        warm.refresh()
+        print(f"Conditional refresh: {warm.stats()['not_modified']} not-modified response(s)")
+
+    server.shutdown()
+
+
+def bench_currency_engine(currencies=160, lookups=100_000):
+    rates = {f"C{i:03d}": 1 + i / 7 for i in range(currencies)}
+    rates["timestamp"] = "benchmark"
+
+    start = time.perf_counter()
+    engine = CurrencyEngine(rates)
+    build = time.perf_counter() - start
+    print(f"Currency matrix: {currencies}x{currencies} built in {build * 1000:.2f} ms")
+
+    start = time.perf_counter()
+    for _ in range(lookups):
+        engine.convert(12.5, "C001", "C150")
+    elapsed = time.perf_counter() - start
+    print(f"Currency conversion: {elapsed / lookups * 1e6:.3f} µs per call")
+
+
+if __name__ == "__main__":
+    bench_single_conversion()
+    bench_batch_conversion()
+    bench_currency_engine()
+    bench_chat_parser()
+    bench_llm_deadlines()
+    bench_rate_store()
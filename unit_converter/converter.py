@@ -0,0 +1,158 @@
+# Local conversion engine for the Smart Converter
+#
+# Every unit is described by (scale, offset) relative to its category's base
+# unit, so that base = value * scale + offset. Linear units have offset 0;
+# temperature is affine. All from/to pairs are folded into a single
+# (factor, shift) lookup at import time, so a conversion is one dict lookup,
+# one multiply and one add.
+
+import io
+
+import numpy as np
+
+# Base units: Meter, Gram, Liter, Kelvin, Square Meter, Second, Byte, Meter per Second
+UNIT_DEFINITIONS = {
+    "Length": {
+        "Meter": (1.0, 0.0),
+        "Kilometer": (1000.0, 0.0),
+        "Centimeter": (0.01, 0.0),
+        "Millimeter": (0.001, 0.0),
+        "Inch": (0.0254, 0.0),
+        "Foot": (0.3048, 0.0),
+        "Yard": (0.9144, 0.0),
+        "Mile": (1609.344, 0.0),
+    },
+    "Weight": {
+        "Gram": (1.0, 0.0),
+        "Kilogram": (1000.0, 0.0),
+        "Milligram": (0.001, 0.0),
+        "Pound": (453.59237, 0.0),
+        "Ounce": (28.349523125, 0.0),
+        "Ton": (1_000_000.0, 0.0),  # metric tonne
+    },
+    "Volume": {
+        "Liter": (1.0, 0.0),
+        "Milliliter": (0.001, 0.0),
+        "Cubic Meter": (1000.0, 0.0),
+        "Gallon": (3.785411784, 0.0),  # US liquid
+        "Quart": (0.946352946, 0.0),
+        "Pint": (0.473176473, 0.0),
+        "Cup": (0.2365882365, 0.0),
+    },
+    "Temperature": {
+        "Celsius": (1.0, 273.15),
+        "Fahrenheit": (5.0 / 9.0, 273.15 - 32.0 * 5.0 / 9.0),
+        "Kelvin": (1.0, 0.0),
+    },
+    "Area": {
+        "Square Meter": (1.0, 0.0),
+        "Square Kilometer": (1_000_000.0, 0.0),
+        "Square Centimeter": (0.0001, 0.0),
+        "Square Inch": (0.00064516, 0.0),
+        "Square Foot": (0.09290304, 0.0),
+        "Acre": (4046.8564224, 0.0),
+        "Hectare": (10_000.0, 0.0),
+    },
+    "Time": {
+        "Second": (1.0, 0.0),
+        "Millisecond": (0.001, 0.0),
+        "Minute": (60.0, 0.0),
+        "Hour": (3600.0, 0.0),
+        "Day": (86_400.0, 0.0),
+        "Week": (604_800.0, 0.0),
+        "Month": (2_629_746.0, 0.0),  # average Gregorian month
+        "Year": (31_556_952.0, 0.0),  # average Gregorian year
+    },
+    "Data": {
+        "Byte": (1.0, 0.0),
+        "Kilobyte": (1024.0, 0.0),
+        "Megabyte": (1024.0 ** 2, 0.0),
+        "Gigabyte": (1024.0 ** 3, 0.0),
+        "Terabyte": (1024.0 ** 4, 0.0),
+        "Bit": (0.125, 0.0),
+    },
+    "Speed": {
+        "Meter per Second": (1.0, 0.0),
+        "Kilometer per Hour": (1000.0 / 3600.0, 0.0),
+        "Mile per Hour": (0.44704, 0.0),
+        "Knot": (1852.0 / 3600.0, 0.0),
+    },
+}
+
+# Unit names per category, in display order
+UNITS = {category: list(defs) for category, defs in UNIT_DEFINITIONS.items()}
+
+# Unit name -> category
+UNIT_CATEGORY = {
+    unit: category
+    for category, defs in UNIT_DEFINITIONS.items()
+    for unit in defs
+}
+
+
+def _build_pair_table():
+    table = {}
+    for defs in UNIT_DEFINITIONS.values():
+        for from_unit, (from_scale, from_offset) in defs.items():
+            for to_unit, (to_scale, to_offset) in defs.items():
+                factor = from_scale / to_scale
+                shift = (from_offset - to_offset) / to_scale
+                table[(from_unit, to_unit)] = (factor, shift)
+    return table
+
+
+# (from_unit, to_unit) -> (factor, shift), so that result = value * factor + shift
+PAIR_TABLE = _build_pair_table()
+
+
+def get_conversion(from_unit, to_unit):
+    try:
+        return PAIR_TABLE[(from_unit, to_unit)]
+    except KeyError:
+        if from_unit not in UNIT_CATEGORY or to_unit not in UNIT_CATEGORY:
+            raise ValueError(f"Unknown unit: {from_unit!r} or {to_unit!r}") from None
+        raise ValueError(
+            f"Cannot convert {UNIT_CATEGORY[from_unit]} to {UNIT_CATEGORY[to_unit]}"
+        ) from None
+
+
+# Affine conversions can cancel to float residue (32 F -> 7e-15 C); results this
+# small relative to the shift are snapped to zero. Pure scalings are never snapped,
+# so genuinely small values (1 Byte -> Terabyte) survive.
+RESIDUE = 1e-12
+
+
+def convert(value, from_unit, to_unit):
+    factor, shift = get_conversion(from_unit, to_unit)
+    result = value * factor + shift
+    if shift and abs(result) < RESIDUE * abs(shift):
+        return 0.0
+    return result
+
+
+def format_conversion(value, unit):
+    # Fixed decimals with thousands separators (1,000,000 not 1e+06); only values
+    # too small to show in six decimals fall back to scientific notation
+    value += 0.0  # -0.0 -> 0.0
+    if value and abs(value) < 1e-4:
+        text = f"{value:.6g}"
+    else:
+        text = f"{value:,.6f}".rstrip("0").rstrip(".")
+    return f"{text} {unit}"
+
+
+def convert_array(values, from_unit, to_unit):
+    # One vectorized pass over the whole column
+    factor, shift = get_conversion(from_unit, to_unit)
+    values = np.asarray(values, dtype=np.float64)
+    result = values * factor + shift
+    if shift:
+        result[np.abs(result) < RESIDUE * abs(shift)] = 0.0
+    return result
+
+
+def to_csv_bytes(values, column="value"):
+    # One-column CSV, written by numpy straight into a byte buffer
+    buffer = io.BytesIO()
+    np.savetxt(buffer, values, fmt="%.10g", header=column, comments="")
+    return buffer.getvalue()
@@ -0,0 +1,60 @@
+# Local currency engine for the Smart Converter
+#
+# The rate table from open.er-api.com is USD-based, so any pair is a cross rate
+# from -> USD -> to. The full N x N matrix is computed once per rate snapshot
+# with Decimal arithmetic, after which every conversion is a single lookup.
+
+from decimal import Decimal
+
+CENT = Decimal("0.01")
+MICRO = Decimal("0.000001")
+
+
+class CurrencyEngine:
+    def __init__(self, rates):
+        self.version = rates.get("timestamp")
+        usd_rates = {
+            code: Decimal(str(rate))
+            for code, rate in rates.items()
+            if code != "timestamp"
+        }
+        self.currencies = list(usd_rates)
+        # (from, to) -> units of `to` per one unit of `from`
+        self.matrix = {
+            (from_code, to_code): to_rate / from_rate
+            for from_code, from_rate in usd_rates.items()
+            for to_code, to_rate in usd_rates.items()
+        }
+
+    def rate(self, from_currency, to_currency):
+        try:
+            return self.matrix[(from_currency, to_currency)]
+        except KeyError:
+            raise ValueError(f"Unknown currency pair: {from_currency} -> {to_currency}") from None
+
+    def convert(self, amount, from_currency, to_currency):
+        return Decimal(str(amount)) * self.rate(from_currency, to_currency)
+
+    def convert_many(self, amounts, from_currency, to_currency):
+        rate = self.rate(from_currency, to_currency)
+        return [Decimal(str(amount)) * rate for amount in amounts]
+
+
+_engines = {}
+
+
+def get_currency_engine(rates):
+    # One engine per rate snapshot; a new upstream timestamp replaces the old one
+    version = rates.get("timestamp")
+    engine = _engines.get(version)
+    if engine is None:
+        engine = CurrencyEngine(rates)
+        _engines.clear()
+        _engines[version] = engine
+    return engine
+
+
+def format_money(amount, currency):
+    # Keep sub-unit amounts (e.g. 1 JPY in BHD) readable instead of rounding to 0.00
+    quantum = CENT if abs(amount) >= 1 else MICRO
+    return f"{amount.quantize(quantum):,f} {currency}"
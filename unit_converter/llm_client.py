@@ -0,0 +1,90 @@
+# Non-blocking request layer for LLM calls
+#
+# Calls run on a shared, bounded thread pool so the Streamlit script thread
+# only waits up to a per-call deadline. Each session keeps at most one call in
+# flight: submitting a new prompt cancels the previous one, and a full pool
+# rejects new work immediately instead of piling up threads.
+
+import threading
+from concurrent.futures import CancelledError, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+
+class LLMUnavailable(Exception):
+    pass
+
+
+class LLMTimeout(LLMUnavailable):
+    pass
+
+
+class LLMBusy(LLMUnavailable):
+    pass
+
+
+class LLMCancelled(LLMUnavailable):
+    pass
+
+
+class LLMClient:
+    def __init__(self, generate, max_concurrency=4, timeout=20.0):
+        self.generate = generate
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = {}  # session_id -> Future
+
+        self.completed = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.cancelled = 0
+
+    def submit(self, prompt, session_id=None):
+        if session_id is not None:
+            self.cancel(session_id)
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise LLMBusy("Too many AI requests in flight")
+
+        future = self._executor.submit(self.generate, prompt)
+        future.add_done_callback(lambda _: self._slots.release())
+        if session_id is not None:
+            with self._lock:
+                self._in_flight[session_id] = future
+        return future
+
+    def cancel(self, session_id):
+        with self._lock:
+            future = self._in_flight.pop(session_id, None)
+        # A call that already started can't be interrupted (it keeps its slot and its
+        # result is just dropped), so only queued calls count as cancelled
+        if future is not None and not future.done() and future.cancel():
+            self.cancelled += 1
+
+    def ask(self, prompt, session_id=None, timeout=None):
+        future = self.submit(prompt, session_id)
+        try:
+            result = future.result(timeout=self.timeout if timeout is None else timeout)
+        except FutureTimeoutError:
+            self.timeouts += 1
+            future.cancel()
+            raise LLMTimeout("The AI service did not answer in time") from None
+        except CancelledError:
+            raise LLMCancelled("Superseded by a newer request") from None
+        finally:
+            if session_id is not None:
+                with self._lock:
+                    if self._in_flight.get(session_id) is future:
+                        del self._in_flight[session_id]
+
+        self.completed += 1
+        return result
+
+    def stats(self):
+        return {
+            "completed": self.completed,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+        }
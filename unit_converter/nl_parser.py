@@ -0,0 +1,162 @@
+# Natural-language conversion parser for the chat tab
+#
+# Recognises requests like "Convert 10 USD to INR", "5 meters in feet" or
+# "how many feet in 3 miles" with a couple of precompiled regexes and a
+# lowercase alias index over every unit name, plural and common abbreviation.
+# Anything it cannot resolve is left for the LLM.
+
+import re
+from collections import namedtuple
+
+from converter import UNIT_CATEGORY
+
+ParsedConversion = namedtuple("ParsedConversion", ["value", "from_unit", "to_unit", "kind"])
+
+IRREGULAR_PLURALS = {"Foot": "feet", "Inch": "inches", "Square Foot": "square feet", "Square Inch": "square inches"}
+
+ABBREVIATIONS = {
+    "Meter": ["m", "metre", "metres"],
+    "Kilometer": ["km", "kms", "kilometre", "kilometres"],
+    "Centimeter": ["cm", "centimetre", "centimetres"],
+    "Millimeter": ["mm", "millimetre", "millimetres"],
+    "Inch": ["in", "\""],
+    "Foot": ["ft", "'"],
+    "Yard": ["yd", "yds"],
+    "Mile": ["mi"],
+    "Gram": ["g", "gm", "gms", "grams"],
+    "Kilogram": ["kg", "kgs", "kilo", "kilos"],
+    "Milligram": ["mg"],
+    "Pound": ["lb", "lbs"],
+    "Ounce": ["oz"],
+    "Ton": ["t", "tonne", "tonnes"],
+    "Liter": ["l", "litre", "litres"],
+    "Milliliter": ["ml", "millilitre", "millilitres"],
+    "Cubic Meter": ["m3", "m^3", "cubic metre", "cubic metres"],
+    "Gallon": ["gal", "gals"],
+    "Quart": ["qt", "qts"],
+    "Pint": ["pt", "pts"],
+    "Celsius": ["°c", "c", "degc", "centigrade", "degrees celsius"],
+    "Fahrenheit": ["°f", "f", "degf", "degrees fahrenheit"],
+    "Kelvin": ["k"],
+    "Square Meter": ["m2", "m^2", "sq m", "sqm", "square metre", "square metres"],
+    "Square Kilometer": ["km2", "km^2", "sq km"],
+    "Square Centimeter": ["cm2", "cm^2", "sq cm"],
+    "Square Inch": ["in2", "sq in"],
+    "Square Foot": ["ft2", "sq ft", "sqft"],
+    "Acre": ["ac"],
+    "Hectare": ["ha"],
+    "Second": ["s", "sec", "secs"],
+    "Millisecond": ["ms"],
+    "Minute": ["min", "mins"],
+    "Hour": ["h", "hr", "hrs"],
+    "Day": ["d"],
+    "Week": ["wk", "wks"],
+    "Month": ["mo", "mos"],
+    "Year": ["yr", "yrs", "y"],
+    "Byte": ["b"],
+    "Kilobyte": ["kb"],
+    "Megabyte": ["mb"],
+    "Gigabyte": ["gb"],
+    "Terabyte": ["tb"],
+    "Bit": ["bits"],
+    "Meter per Second": ["m/s", "mps", "meters/second", "metres per second"],
+    "Kilometer per Hour": ["km/h", "kmh", "kph", "kmph", "kilometres per hour"],
+    "Mile per Hour": ["mph", "mi/h"],
+    "Knot": ["kn", "kt", "kts"],
+}
+
+CURRENCY_SYMBOLS = {"$": "USD", "€": "EUR", "£": "GBP", "¥": "JPY", "₹": "INR", "rs": "PKR"}
+
+
+def _plural(unit):
+    if unit in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[unit]
+    words = unit.lower().split()
+    if "per" in words:
+        # "Meter per Second" -> "meters per second"
+        index = words.index("per") - 1
+        words[index] += "s"
+        return " ".join(words)
+    if unit in ("Celsius", "Fahrenheit"):
+        return unit.lower()
+    return unit.lower() + "s"
+
+
+def _build_alias_index():
+    index = {}
+    for unit in UNIT_CATEGORY:
+        index[unit.lower()] = unit
+        index[_plural(unit)] = unit
+    for unit, aliases in ABBREVIATIONS.items():
+        for alias in aliases:
+            index.setdefault(alias, unit)
+    return index
+
+
+UNIT_ALIASES = _build_alias_index()
+
+_NUMBER = r"[-+]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?(?:e[-+]?\d+)?|[-+]?\.\d+"
+_LEAD = r"(?:(?:please\s+)?(?:convert|change|what\s+is|what's|how\s+much\s+is)\s+)?"
+_CONNECTOR = r"(?:to|in|into|as|in\s+terms\s+of|->|=)"
+_TAIL = r"\s*[?.!]*\s*$"
+
+# "convert 10 usd to inr", "5km in miles", "$20 to eur"
+FORWARD_PATTERN = re.compile(
+    rf"^\s*{_LEAD}(?P<symbol>[$€£¥₹])?\s*(?P<value>{_NUMBER})\s*(?P<from>.+?)?\s+{_CONNECTOR}\s+(?P<to>.+?){_TAIL}",
+    re.IGNORECASE,
+)
+# "how many feet in 3 miles", "how many inr is 10 usd"
+REVERSE_PATTERN = re.compile(
+    rf"^\s*how\s+many\s+(?P<to>.+?)\s+(?:in|is|are|=)\s+(?P<value>{_NUMBER})\s*(?P<from>.+?){_TAIL}",
+    re.IGNORECASE,
+)
+CURRENCY_CODE = re.compile(r"^[a-z]{3}$", re.IGNORECASE)
+
+
+class ConversionParser:
+    def __init__(self, currencies=None):
+        # When given, currency codes are validated here; otherwise the caller does it
+        self.currencies = {code.upper() for code in currencies} if currencies else None
+
+    def parse(self, text):
+        match = FORWARD_PATTERN.match(text) or REVERSE_PATTERN.match(text)
+        if match is None:
+            return None
+
+        groups = match.groupdict()
+        from_text = groups.get("symbol") or groups.get("from")
+        if not from_text:
+            return None
+        value = float(groups["value"].replace(",", ""))
+        return self._resolve(value, from_text, groups["to"])
+
+    def _resolve(self, value, from_text, to_text):
+        from_key = self._clean(from_text)
+        to_key = self._clean(to_text)
+
+        from_unit = UNIT_ALIASES.get(from_key)
+        to_unit = UNIT_ALIASES.get(to_key)
+        if from_unit and to_unit and UNIT_CATEGORY[from_unit] == UNIT_CATEGORY[to_unit]:
+            return ParsedConversion(value, from_unit, to_unit, "unit")
+
+        from_code = self._currency(from_key)
+        to_code = self._currency(to_key)
+        if from_code and to_code:
+            return ParsedConversion(value, from_code, to_code, "currency")
+        return None
+
+    def _currency(self, key):
+        code = CURRENCY_SYMBOLS.get(key)
+        if code is None and CURRENCY_CODE.match(key):
+            code = key.upper()
+        if code is None or (self.currencies is not None and code not in self.currencies):
+            return None
+        return code
+
+    @staticmethod
+    def _clean(text):
+        text = " ".join(text.lower().split())
+        for prefix in ("degrees ", "degree "):
+            if text.startswith(prefix) and text not in UNIT_ALIASES:
+                text = text[len(prefix):]
+        return text
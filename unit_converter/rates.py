@@ -0,0 +1,147 @@
+# Exchange-rate store for the Smart Converter
+#
+# Rates are held in-process keyed on the upstream "time_last_update_utc",
+# mirrored to an on-disk snapshot so cold starts and offline runs are instant,
+# and refreshed with conditional requests in a background thread once the
+# upstream "time_next_update_unix" has passed.
+
+import json
+import os
+import threading
+import time
+
+import requests
+
+CURRENCY_API_URL = "https://open.er-api.com/v6/latest/USD"
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rates_snapshot.json")
+
+
+class RateStore:
+    def __init__(self, url=CURRENCY_API_URL, snapshot_path=DEFAULT_SNAPSHOT_PATH,
+                 min_refresh_interval=300, timeout=10):
+        self.url = url
+        self.snapshot_path = snapshot_path
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self.session = requests.Session()
+
+        self._lock = threading.Lock()
+        self._refresh_thread = None
+        self._cache = {}  # time_last_update_utc -> rates dict
+        self._version = None
+        self._etag = None
+        self._last_modified = None
+        self._fresh_until = 0.0
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.not_modified = 0
+        self.errors = 0
+
+        self._load_snapshot()
+
+    # ----- Public API -----
+    def get_rates(self):
+        with self._lock:
+            version = self._version
+            stale = time.time() >= self._fresh_until
+
+        if version is None:
+            # Cold start with no snapshot: the only time we block on the network
+            self.misses += 1
+            self.refresh()
+            with self._lock:
+                if self._version is None:
+                    raise RuntimeError("Exchange rates are unavailable")
+                return self._cache[self._version]
+
+        self.hits += 1
+        if stale:
+            self.refresh_in_background()
+        return self._cache[version]
+
+    def refresh(self):
+        headers = {}
+        if self._etag:
+            headers["If-None-Match"] = self._etag
+        if self._last_modified:
+            headers["If-Modified-Since"] = self._last_modified
+
+        try:
+            response = self.session.get(self.url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304:
+                self.not_modified += 1
+                self._extend_freshness(None)
+                return
+            response.raise_for_status()
+            data = response.json()
+        except (requests.RequestException, ValueError):
+            # Keep serving whatever we have and retry later
+            self.errors += 1
+            self._extend_freshness(None)
+            return
+
+        self.refreshes += 1
+        self._store(data, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        self._save_snapshot(data)
+
+    def refresh_in_background(self):
+        with self._lock:
+            if self._refresh_thread is not None and self._refresh_thread.is_alive():
+                return
+            self._refresh_thread = threading.Thread(target=self.refresh, daemon=True)
+            self._refresh_thread.start()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "refreshes": self.refreshes,
+            "not_modified": self.not_modified,
+            "errors": self.errors,
+            "version": self._version,
+        }
+
+    # ----- Internals -----
+    def _store(self, data, etag=None, last_modified=None):
+        version = data["time_last_update_utc"]
+        with self._lock:
+            if version not in self._cache:
+                rates = dict(data["rates"])
+                rates["timestamp"] = version
+                # Only the current snapshot is worth keeping around
+                self._cache = {version: rates}
+            self._version = version
+            self._etag = etag
+            self._last_modified = last_modified
+        self._extend_freshness(data.get("time_next_update_unix"))
+
+    def _extend_freshness(self, next_update_unix):
+        floor = time.time() + self.min_refresh_interval
+        with self._lock:
+            self._fresh_until = max(next_update_unix or 0, floor)
+
+    def _load_snapshot(self):
+        try:
+            with open(self.snapshot_path, "r") as file:
+                snapshot = json.load(file)
+            self._store(snapshot["data"], snapshot.get("etag"), snapshot.get("last_modified"))
+        except (OSError, ValueError, KeyError):
+            return
+        # The snapshot may be old; let the first lookup trigger a background refresh
+        next_update = snapshot["data"].get("time_next_update_unix") or 0
+        with self._lock:
+            self._fresh_until = next_update
+
+    def _save_snapshot(self, data):
+        snapshot = {"data": data, "etag": self._etag, "last_modified": self._last_modified}
+        tmp_path = f"{self.snapshot_path}.tmp"
+        try:
+            with open(tmp_path, "w") as file:
+                json.dump(snapshot, file)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError:
+            pass
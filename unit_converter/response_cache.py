@@ -0,0 +1,109 @@
+# Shared response cache for LLM prompts
+#
+# Entries are keyed on a hash of the normalized prompt, held in a bounded LRU
+# with a per-entry TTL, and optionally mirrored to a SQLite file so answers
+# survive restarts and are shared between worker processes.
+
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_prompt(prompt):
+    return " ".join(prompt.lower().split())
+
+
+def prompt_key(prompt):
+    return hashlib.sha256(normalize_prompt(prompt).encode()).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries=1024, ttl=24 * 3600, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._miss_seconds = 0.0
+
+        self._db = None
+        if disk_path:
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, expires_at REAL, response TEXT)"
+            )
+            self._db.commit()
+
+    def get(self, prompt):
+        key = prompt_key(prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT expires_at, response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and row[0] > now:
+                    self._remember(key, row[0], row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return row[1]
+        return None
+
+    def put(self, prompt, response, ttl=None):
+        key = prompt_key(prompt)
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, expires_at, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)",
+                    (key, expires_at, response),
+                )
+                self._db.commit()
+
+    def get_or_compute(self, prompt, compute, ttl=None):
+        response = self.get(prompt)
+        if response is not None:
+            return response
+
+        start = time.perf_counter()
+        response = compute(prompt)
+        with self._lock:
+            self.misses += 1
+            self._miss_seconds += time.perf_counter() - start
+        self.put(prompt, response, ttl)
+        return response
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            avg_miss = self._miss_seconds / self.misses if self.misses else 0.0
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "saved_calls": self.hits,
+                "saved_seconds": self.hits * avg_miss,
+            }
+
+    def _remember(self, key, expires_at, response):
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)